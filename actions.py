@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Action Executor - Run batches of tool actions under named timing profiles
+
+The functions in tools.py each pay the backend pause (pyautogui.PAUSE) after
+every input call, plus a mouse glide before clicks. This module runs a list of primitive actions
+under a timing profile ("human-like", "fast" or "instant"), drops redundant
+mouse moves, and records how much of each action was deliberate delay.
+
+Actions use the tool call format of the providers:
+    {"name": "click_mouse", "parameters": {"x": 100, "y": 200}}
+where name is a function of tools.py.
+
+Requirements:
+- An input backend, see backends.py
+"""
+
+import time
+from contextlib import contextmanager
+
+from os_computer_use import tools
+from os_computer_use.backends import get_backend
+from os_computer_use.settle import wait_until_stable
+from os_computer_use.tracing import span
+
+
+class TimingProfile:
+    """
+    Delays applied while running actions.
+    """
+
+    def __init__(self, name, pause, move_duration, drag_duration, type_interval):
+        self.name = name
+        self.pause = pause  # Backend pause, slept after every input call
+        self.move_duration = move_duration  # Mouse glide before moves, clicks and scrolls
+        self.drag_duration = drag_duration  # Duration of drags
+        self.type_interval = type_interval  # Seconds between typed characters
+
+    def __repr__(self):
+        return f"TimingProfile({self.name!r})"
+
+
+PROFILES = {
+    # The defaults of tools.py
+    "human-like": TimingProfile("human-like", pause=0.1, move_duration=0.2, drag_duration=0.2, type_interval=0.05),
+    "fast": TimingProfile("fast", pause=0.02, move_duration=0.0, drag_duration=0.1, type_interval=0.005),
+    "instant": TimingProfile("instant", pause=0.0, move_duration=0.0, drag_duration=0.0, type_interval=0.0),
+}
+
+# Timing parameter of each tool and the profile attribute supplying it
+TIMING_PARAMS = {
+    "move_mouse": ("duration", "move_duration"),
+    "click_mouse": ("duration", "move_duration"),
+    "double_click": ("duration", "move_duration"),
+    "scroll": ("duration", "move_duration"),
+    "scroll_down": ("duration", "move_duration"),
+    "scroll_up": ("duration", "move_duration"),
+    "page_down": ("duration", "move_duration"),
+    "page_up": ("duration", "move_duration"),
+    "drag_mouse": ("duration", "drag_duration"),
+    "type_text": ("interval", "type_interval"),
+}
+
+# Tools that move the mouse to optional x, y parameters before acting
+POSITIONED = {"click_mouse", "double_click", "scroll", "scroll_down", "scroll_up", "page_down", "page_up"}
+
+# Numeric tool parameters, which the providers pass as strings
+NUMERIC_PARAMS = {"x", "y", "start_x", "start_y", "end_x", "end_y", "clicks", "amount", "duration", "interval"}
+
+# Number of backend calls, each followed by the backend pause, without and with a move to x, y
+PYAUTOGUI_CALLS = {
+    "move_mouse": (1, 1),
+    "click_mouse": (1, 2),
+    "double_click": (1, 2),
+    "scroll": (1, 2),
+    "scroll_down": (1, 2),
+    "scroll_up": (1, 2),
+    "page_down": (1, 2),
+    "page_up": (1, 2),
+    "drag_mouse": (2, 2),
+}
+
+
+def get_profile(profile):
+    """
+    Look up a timing profile.
+
+    Args:
+        profile (str or TimingProfile): Profile name or profile
+
+    Returns:
+        TimingProfile: The profile
+    """
+    if isinstance(profile, TimingProfile):
+        return profile
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown timing profile: {profile} (expected one of {', '.join(PROFILES)})")
+    return PROFILES[profile]
+
+
+def to_number(value):
+    """
+    Convert a tool parameter to a number.
+
+    Args:
+        value: Parameter value, e.g. the string "0.2" from a tool call
+
+    Returns:
+        int or float: The number (an int if it is integral), or the value
+                      unchanged if it is not a number
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return value
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return int(number) if number.is_integer() else number
+
+
+@contextmanager
+def timing(profile):
+    """
+    Temporarily apply a profile's pause to the input backend.
+
+    Args:
+        profile (str or TimingProfile): Profile name or profile
+    """
+    backend = get_backend()
+    previous = backend.pause
+    backend.pause = get_profile(profile).pause
+    try:
+        yield
+    finally:
+        backend.pause = previous
+
+
+def coalesce(actions):
+    """
+    Drop mouse moves that a later action makes redundant.
+
+    A move followed by another move, or by an action that moves to its own
+    coordinates, is dropped. A move followed by a click, double click or scroll
+    without coordinates is folded into that action. Moves without coordinates
+    are left alone.
+
+    Args:
+        actions (list): Actions as {"name": ..., "parameters": {...}} dicts
+
+    Returns:
+        list: The actions to run
+    """
+    result = []
+    for action in actions:
+        name = action["name"]
+        parameters = dict(action.get("parameters") or {})
+        previous = result[-1]["parameters"] if result and result[-1]["name"] == "move_mouse" else None
+        if previous is not None and previous.get("x") is not None and previous.get("y") is not None:
+            if name == "move_mouse":
+                result.pop()
+            elif name in POSITIONED:
+                if parameters.get("x") is None or parameters.get("y") is None:
+                    parameters["x"], parameters["y"] = previous["x"], previous["y"]
+                result.pop()
+        result.append({"name": name, "parameters": parameters})
+    return result
+
+
+def planned_delay(name, parameters, profile, result=None):
+    """
+    Estimate the deliberate delay of an action: pauses, glides and typing intervals.
+
+    Args:
+        name (str): Tool name
+        parameters (dict): Tool parameters, including the timing parameter
+        profile (TimingProfile): Profile the action runs under
+        result (optional): Return value of the tool, the strategy used for type_text
+
+    Returns:
+        float: Seconds spent sleeping on purpose
+    """
+    positioned = parameters.get("x") is not None and parameters.get("y") is not None
+    calls = PYAUTOGUI_CALLS.get(name, (1, 1))[1 if positioned else 0]
+    delay = calls * profile.pause
+
+    if name == "type_text":
+        # Pasting waits for the application to show the text rather than sleeping
+        interval = to_number(parameters.get("interval", profile.type_interval))
+        if result != "paste" and isinstance(interval, (int, float)):
+            delay += len(parameters.get("text", "")) * interval
+    elif name == "drag_mouse" or name == "move_mouse" or (name in POSITIONED and positioned):
+        duration = to_number(parameters.get("duration", 0))
+        # Backends move instantly below their minimum duration
+        if isinstance(duration, (int, float)) and duration > get_backend().minimum_duration:
+            delay += duration
+    return delay
+
+
+class ActionExecutor:
+    """
+    Runs lists of actions under a timing profile and records their timing.
+    """
+
+    def __init__(self, profile="fast", coalesce_moves=True, settle_timeout=None):
+        self.profile = get_profile(profile)
+        self.coalesce_moves = coalesce_moves
+        self.settle_timeout = settle_timeout  # Wait up to this long for the screen to settle after a run
+        self.timings = []  # One record per executed action, across runs
+
+    def plan(self, actions):
+        """
+        Return the actions that would run, with numeric parameters converted
+        and timing parameters filled in.
+
+        Args:
+            actions (list): Actions as {"name": ..., "parameters": {...}} dicts
+
+        Returns:
+            list: Actions to run
+        """
+        actions = coalesce(actions) if self.coalesce_moves else [
+            {"name": action["name"], "parameters": dict(action.get("parameters") or {})}
+            for action in actions
+        ]
+        for action in actions:
+            function = getattr(tools, action["name"], None)
+            if not callable(function) or getattr(function, "__module__", None) != tools.__name__:
+                raise ValueError(f"Unknown action: {action['name']}")
+            for param in NUMERIC_PARAMS.intersection(action["parameters"]):
+                action["parameters"][param] = to_number(action["parameters"][param])
+            if action["name"] in TIMING_PARAMS:
+                param, attribute = TIMING_PARAMS[action["name"]]
+                action["parameters"].setdefault(param, getattr(self.profile, attribute))
+        return actions
+
+    def run(self, actions):
+        """
+        Run actions in order.
+
+        Args:
+            actions (list): Actions as {"name": ..., "parameters": {...}} dicts
+
+        Returns:
+            list: Timing records of this run, with name, elapsed, delay and
+                  work (elapsed minus delay) in seconds. With a settle_timeout,
+                  the last record is the wait for the screen to settle.
+        """
+        records = []
+        planned = self.plan(actions)
+        with timing(self.profile), span("actions.run", profile=self.profile.name, actions=len(planned)):
+            for action in planned:
+                name, parameters = action["name"], action["parameters"]
+                start = time.perf_counter()
+                with span(f"actions.{name}"):
+                    result = getattr(tools, name)(**parameters)
+                elapsed = time.perf_counter() - start
+                delay = min(planned_delay(name, parameters, self.profile, result), elapsed)
+                records.append(
+                    {
+                        "name": name,
+                        "parameters": parameters,
+                        "result": result,
+                        "elapsed": elapsed,
+                        "delay": delay,
+                        "work": elapsed - delay,
+                    }
+                )
+        if self.settle_timeout is not None:
+            settled = wait_until_stable(timeout=self.settle_timeout)
+            records.append(
+                {
+                    "name": "settle",
+                    "parameters": {"timeout": self.settle_timeout},
+                    "result": settled.settled,
+                    "elapsed": settled.elapsed,
+                    "delay": 0.0,
+                    "work": settled.elapsed,
+                }
+            )
+        self.timings.extend(records)
+        return records
+
+    @staticmethod
+    def summary(records):
+        """
+        Total the timing records of one or more runs.
+
+        Args:
+            records (list): Records from run() or ActionExecutor.timings
+
+        Returns:
+            dict: actions, elapsed, delay, work and delay_fraction
+        """
+        elapsed = sum(record["elapsed"] for record in records)
+        delay = sum(record["delay"] for record in records)
+        return {
+            "actions": len(records),
+            "elapsed": elapsed,
+            "delay": delay,
+            "work": elapsed - delay,
+            "delay_fraction": delay / elapsed if elapsed else 0.0,
+        }
+
+
+def run_actions(actions, profile="fast"):
+    """
+    Run actions under a timing profile.
+
+    Args:
+        actions (list): Actions as {"name": ..., "parameters": {...}} dicts
+        profile (str or TimingProfile): Profile name or profile
+
+    Returns:
+        list: Timing records, see ActionExecutor.run
+    """
+    return ActionExecutor(profile).run(actions)
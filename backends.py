@@ -0,0 +1,629 @@
+#!/usr/bin/env python3
+"""
+Input Backends - Pluggable mouse, keyboard and screen capture
+
+tools.py, screenshot.py, screenshot_base64.py, settle.py and actions.py drive
+the display through the backend returned by get_backend(). Three backends are
+available:
+
+- PyAutoGUIBackend: the real desktop through pyautogui (the default)
+- VirtualBackend: an in-memory framebuffer that records every event, for
+  headless tests and benchmarks
+- XvfbBackend: a private Xvfb display on Linux, driven with xdotool
+
+The default backend can be chosen with INPUT_BACKEND=pyautogui|virtual|xvfb.
+
+Requirements:
+- pillow: pip install pillow
+- pyautogui (PyAutoGUIBackend): pip install pyautogui
+- pyperclip (optional, clipboard of PyAutoGUIBackend): pip install pyperclip
+- Xvfb, xdotool and optionally xclip (XvfbBackend): apt install xvfb xdotool xclip
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from PIL import Image, ImageDraw, ImageGrab
+
+
+class ClipboardError(Exception):
+    """
+    Raised when the clipboard of a backend cannot be read or written.
+    """
+
+
+class InputBackend(ABC):
+    """
+    Mouse, keyboard and screen capture of one display.
+
+    Coordinates are screen pixels; regions are (left, top, width, height).
+    Subclasses implement every abstract method; the clipboard is optional.
+    """
+
+    # Keys pressed together to paste the clipboard
+    paste_keys = ("ctrl", "v")
+
+    # Moves shorter than this are instant, like pyautogui.MINIMUM_DURATION
+    minimum_duration = 0.0
+
+    # Seconds slept after every call, like pyautogui.PAUSE
+    pause = 0.0
+
+    # Whether get_clipboard and set_clipboard work
+    has_clipboard = False
+
+    @abstractmethod
+    def size(self):
+        ...
+
+    @abstractmethod
+    def position(self):
+        ...
+
+    @abstractmethod
+    def move_to(self, x, y, duration=0.0):
+        ...
+
+    @abstractmethod
+    def click(self, button="left", clicks=1):
+        ...
+
+    @abstractmethod
+    def drag_to(self, x, y, duration=0.0, button="left"):
+        ...
+
+    @abstractmethod
+    def scroll(self, clicks):
+        ...
+
+    @abstractmethod
+    def write(self, text, interval=0.0):
+        ...
+
+    @abstractmethod
+    def press(self, key):
+        ...
+
+    @abstractmethod
+    def hotkey(self, *keys):
+        ...
+
+    @abstractmethod
+    def key_down(self, key):
+        ...
+
+    @abstractmethod
+    def key_up(self, key):
+        ...
+
+    @abstractmethod
+    def screenshot(self, region=None):
+        ...
+
+    def get_clipboard(self):
+        raise ClipboardError(f"{self.__class__.__name__} has no clipboard")
+
+    def set_clipboard(self, text):
+        raise ClipboardError(f"{self.__class__.__name__} has no clipboard")
+
+    def close(self):
+        pass
+
+
+class PyAutoGUIBackend(InputBackend):
+    """
+    The real desktop, through pyautogui (imported on first use).
+    """
+
+    def __init__(self, pause=0.1, failsafe=True):
+        self._gui = None
+        self._pause = pause
+        self.failsafe = failsafe  # Move mouse to upper-left corner to abort
+        if sys.platform == "darwin":
+            self.paste_keys = ("command", "v")
+
+    @property
+    def gui(self):
+        if self._gui is None:
+            import pyautogui
+
+            pyautogui.FAILSAFE = self.failsafe
+            pyautogui.PAUSE = self._pause
+            self._gui = pyautogui
+        return self._gui
+
+    @property
+    def pause(self):
+        return self.gui.PAUSE
+
+    @pause.setter
+    def pause(self, value):
+        self.gui.PAUSE = value
+
+    @property
+    def minimum_duration(self):
+        return self.gui.MINIMUM_DURATION
+
+    @property
+    def has_clipboard(self):
+        try:
+            import pyperclip  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def size(self):
+        return tuple(self.gui.size())
+
+    def position(self):
+        return tuple(self.gui.position())
+
+    def move_to(self, x, y, duration=0.0):
+        self.gui.moveTo(x, y, duration=duration)
+
+    def click(self, button="left", clicks=1):
+        if clicks == 1:
+            self.gui.click(button=button)
+        elif clicks == 2 and button == "left":
+            self.gui.doubleClick()
+        else:
+            self.gui.click(button=button, clicks=clicks)
+
+    def drag_to(self, x, y, duration=0.0, button="left"):
+        self.gui.dragTo(x, y, duration=duration, button=button)
+
+    def scroll(self, clicks):
+        self.gui.scroll(clicks)
+
+    def write(self, text, interval=0.0):
+        self.gui.write(text, interval=interval)
+
+    def press(self, key):
+        self.gui.press(key)
+
+    def hotkey(self, *keys):
+        self.gui.hotkey(*keys)
+
+    def key_down(self, key):
+        self.gui.keyDown(key)
+
+    def key_up(self, key):
+        self.gui.keyUp(key)
+
+    def screenshot(self, region=None):
+        if region:
+            return self.gui.screenshot(region=region)
+        return self.gui.screenshot()
+
+    def get_clipboard(self):
+        try:
+            import pyperclip
+
+            return pyperclip.paste()
+        except Exception as e:
+            raise ClipboardError(str(e)) from e
+
+    def set_clipboard(self, text):
+        try:
+            import pyperclip
+
+            pyperclip.copy(text)
+        except Exception as e:
+            raise ClipboardError(str(e)) from e
+
+
+class VirtualBackend(InputBackend):
+    """
+    An in-memory display: input is recorded as events and rendered onto a synthetic framebuffer.
+
+    Typed text is drawn in a text area, clicks leave marks and the cursor is
+    drawn, so screenshots change in response to actions like a real screen.
+    """
+
+    has_clipboard = True
+
+    def __init__(self, size=(1280, 800), background=None, realtime=False, max_events=10000):
+        """
+        Args:
+            size (tuple): Screen size (width, height)
+            background (PIL.Image, optional): Image the screen is rendered on
+            realtime (bool): Whether to sleep for pauses, glides and typing intervals
+            max_events (int): Oldest events are dropped beyond this
+        """
+        self.width, self.height = size
+        self.background = background.convert("RGB").resize(size) if background else self.default_background(size)
+        self.realtime = realtime
+        self.max_events = max_events
+        self.events = []  # Recorded input, as dicts with a type and a timestamp
+        self.cursor = (self.width // 2, self.height // 2)
+        self.lines = [""]  # Text typed so far
+        self.marks = []  # Recent click positions
+        self.scroll_offset = 0
+        self.clipboard = ""
+        self.held_keys = set()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def default_background(size):
+        width, height = size
+        image = Image.new("RGB", size, (236, 236, 236))
+        draw = ImageDraw.Draw(image)
+        draw.rectangle([0, 0, width, 24], fill=(220, 220, 225))
+        draw.rectangle([40, 60, width - 40, height - 40], fill=(255, 255, 255), outline=(180, 180, 180))
+        return image
+
+    def record(self, event_type, **fields):
+        with self.lock:
+            self.events.append({"type": event_type, "time": time.time(), **fields})
+            if len(self.events) > self.max_events:
+                del self.events[: len(self.events) - self.max_events]
+
+    def clear_events(self):
+        with self.lock:
+            self.events = []
+
+    def wait(self, seconds):
+        if self.realtime and seconds > 0:
+            time.sleep(seconds)
+
+    def size(self):
+        return self.width, self.height
+
+    def position(self):
+        return self.cursor
+
+    def move_to(self, x, y, duration=0.0):
+        self.wait(duration if duration > self.minimum_duration else 0)
+        self.cursor = (min(max(int(x), 0), self.width - 1), min(max(int(y), 0), self.height - 1))
+        self.record("move", x=self.cursor[0], y=self.cursor[1])
+        self.wait(self.pause)
+
+    def click(self, button="left", clicks=1):
+        with self.lock:
+            self.marks = (self.marks + [self.cursor])[-32:]
+        self.record("click", x=self.cursor[0], y=self.cursor[1], button=button, clicks=clicks)
+        self.wait(self.pause)
+
+    def drag_to(self, x, y, duration=0.0, button="left"):
+        start = self.cursor
+        self.wait(duration)
+        self.cursor = (min(max(int(x), 0), self.width - 1), min(max(int(y), 0), self.height - 1))
+        self.record("drag", start=start, end=self.cursor, button=button)
+        self.wait(self.pause)
+
+    def scroll(self, clicks):
+        self.scroll_offset += clicks
+        self.record("scroll", clicks=clicks, x=self.cursor[0], y=self.cursor[1])
+        self.wait(self.pause)
+
+    def type_characters(self, text):
+        with self.lock:
+            for character in text:
+                if character in "\r\n":
+                    self.lines.append("")
+                elif character == "\b":
+                    self.lines[-1] = self.lines[-1][:-1]
+                else:
+                    self.lines[-1] += character
+
+    def write(self, text, interval=0.0):
+        self.type_characters(text)
+        self.record("write", text=text)
+        self.wait(interval * len(text))
+        self.wait(self.pause)
+
+    def press(self, key):
+        if key in ("enter", "return"):
+            self.type_characters("\n")
+        elif key == "backspace":
+            self.type_characters("\b")
+        elif key == "space":
+            self.type_characters(" ")
+        elif len(key) == 1:
+            self.type_characters(key)
+        self.record("press", key=key)
+        self.wait(self.pause)
+
+    def hotkey(self, *keys):
+        if tuple(keys) in (("ctrl", "v"), ("command", "v")):
+            self.type_characters(self.clipboard)
+        self.record("hotkey", keys=list(keys))
+        self.wait(self.pause)
+
+    def key_down(self, key):
+        self.held_keys.add(key)
+        self.record("key_down", key=key)
+        self.wait(self.pause)
+
+    def key_up(self, key):
+        self.held_keys.discard(key)
+        self.record("key_up", key=key)
+        self.wait(self.pause)
+
+    def render(self):
+        """
+        Draw the current screen.
+
+        Returns:
+            PIL.Image: Full screen image
+        """
+        image = self.background.copy()
+        draw = ImageDraw.Draw(image)
+        with self.lock:
+            lines = list(self.lines)
+            marks = list(self.marks)
+        top = 70 + self.scroll_offset * 20
+        for index, line in enumerate(lines[-60:]):
+            draw.text((50, top + index * 14), line, fill=(20, 20, 20))
+        for x, y in marks:
+            draw.ellipse([x - 4, y - 4, x + 4, y + 4], outline=(200, 40, 40))
+        x, y = self.cursor
+        draw.polygon([(x, y), (x, y + 16), (x + 11, y + 11)], fill=(0, 0, 0), outline=(255, 255, 255))
+        return image
+
+    def screenshot(self, region=None):
+        image = self.render()
+        if region:
+            left, top, width, height = region
+            image = image.crop((left, top, left + width, top + height))
+        return image
+
+    def get_clipboard(self):
+        return self.clipboard
+
+    def set_clipboard(self, text):
+        self.clipboard = text
+        self.record("clipboard", length=len(text))
+
+
+# pyautogui key names that differ from X keysyms
+XDOTOOL_KEYS = {
+    "enter": "Return",
+    "return": "Return",
+    "tab": "Tab",
+    "esc": "Escape",
+    "escape": "Escape",
+    "backspace": "BackSpace",
+    "delete": "Delete",
+    "del": "Delete",
+    "space": "space",
+    "up": "Up",
+    "down": "Down",
+    "left": "Left",
+    "right": "Right",
+    "home": "Home",
+    "end": "End",
+    "pageup": "Prior",
+    "pagedown": "Next",
+    "insert": "Insert",
+    "command": "super",
+    "win": "super",
+    "option": "alt",
+    "ctrlleft": "Control_L",
+    "ctrlright": "Control_R",
+    "shiftleft": "Shift_L",
+    "shiftright": "Shift_R",
+    "altleft": "Alt_L",
+    "altright": "Alt_R",
+}
+
+XDOTOOL_BUTTONS = {"left": 1, "middle": 2, "right": 3}
+
+
+def find_free_display(first=99, last=199):
+    """
+    Find an X display number with no running server.
+
+    Returns:
+        str: Display name, e.g. ":99"
+    """
+    for number in range(first, last):
+        if not os.path.exists(f"/tmp/.X{number}-lock") and not os.path.exists(f"/tmp/.X11-unix/X{number}"):
+            return f":{number}"
+    raise RuntimeError("No free X display number found")
+
+
+class XvfbBackend(InputBackend):
+    """
+    A private Xvfb display on Linux, driven with xdotool and captured with Pillow.
+    """
+
+    def __init__(self, display=None, size=(1280, 800), depth=24, start=True, startup_timeout=5.0):
+        """
+        Args:
+            display (str, optional): X display, e.g. ":99"; a free one is picked by default
+            size (tuple): Screen size (width, height)
+            depth (int): Color depth in bits
+            start (bool): Whether to start Xvfb, False to attach to a running display
+            startup_timeout (float): Seconds to wait for Xvfb to accept connections
+        """
+        for tool in ["xdotool"] + (["Xvfb"] if start else []):
+            if shutil.which(tool) is None:
+                raise RuntimeError(f"{tool} is required for XvfbBackend")
+        self.display = display or find_free_display()
+        self.width, self.height = size
+        self.depth = depth
+        self.env = {**os.environ, "DISPLAY": self.display}
+        self.process = None
+        self.has_clipboard = shutil.which("xclip") is not None
+        if start:
+            self.start(startup_timeout)
+
+    def start(self, timeout=5.0):
+        self.process = subprocess.Popen(
+            ["Xvfb", self.display, "-screen", "0", f"{self.width}x{self.height}x{self.depth}", "-nolisten", "tcp"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        socket_path = f"/tmp/.X11-unix/X{self.display.lstrip(':').split('.')[0]}"
+        deadline = time.monotonic() + timeout
+        while not os.path.exists(socket_path):
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Xvfb exited with code {self.process.returncode} on display {self.display}")
+            if time.monotonic() > deadline:
+                self.close()
+                raise RuntimeError(f"Xvfb did not start on display {self.display}")
+            time.sleep(0.05)
+
+    def close(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+    def xdotool(self, *args):
+        result = subprocess.run(
+            ["xdotool", *[str(arg) for arg in args]], env=self.env, capture_output=True, text=True, check=True
+        )
+        return result.stdout
+
+    @staticmethod
+    def key_name(key):
+        if key.startswith("f") and key[1:].isdigit():
+            return key.upper()
+        return XDOTOOL_KEYS.get(key, key)
+
+    def after(self):
+        if self.pause > 0:
+            time.sleep(self.pause)
+
+    def size(self):
+        return self.width, self.height
+
+    def position(self):
+        fields = dict(line.split("=", 1) for line in self.xdotool("getmouselocation", "--shell").split())
+        return int(fields["X"]), int(fields["Y"])
+
+    def move_to(self, x, y, duration=0.0):
+        if duration > self.minimum_duration:
+            time.sleep(duration)
+        self.xdotool("mousemove", int(x), int(y))
+        self.after()
+
+    def click(self, button="left", clicks=1):
+        self.xdotool("click", "--repeat", clicks, XDOTOOL_BUTTONS.get(button, 1))
+        self.after()
+
+    def drag_to(self, x, y, duration=0.0, button="left"):
+        number = XDOTOOL_BUTTONS.get(button, 1)
+        self.xdotool("mousedown", number)
+        if duration > 0:
+            time.sleep(duration)
+        self.xdotool("mousemove", int(x), int(y), "mouseup", number)
+        self.after()
+
+    def scroll(self, clicks):
+        if clicks:
+            self.xdotool("click", "--repeat", abs(int(clicks)), 4 if clicks > 0 else 5)
+        self.after()
+
+    def write(self, text, interval=0.0):
+        self.xdotool("type", "--delay", int(interval * 1000), "--", text)
+        self.after()
+
+    def press(self, key):
+        self.xdotool("key", self.key_name(key))
+        self.after()
+
+    def hotkey(self, *keys):
+        self.xdotool("key", "+".join(self.key_name(key) for key in keys))
+        self.after()
+
+    def key_down(self, key):
+        self.xdotool("keydown", self.key_name(key))
+        self.after()
+
+    def key_up(self, key):
+        self.xdotool("keyup", self.key_name(key))
+        self.after()
+
+    def screenshot(self, region=None):
+        bbox = None
+        if region:
+            left, top, width, height = region
+            bbox = (left, top, left + width, top + height)
+        return ImageGrab.grab(bbox=bbox, xdisplay=self.display)
+
+    def get_clipboard(self):
+        try:
+            result = subprocess.run(
+                ["xclip", "-selection", "clipboard", "-o"], env=self.env, capture_output=True, text=True, timeout=2
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise ClipboardError(str(e)) from e
+        # xclip fails while the clipboard is empty
+        return result.stdout if result.returncode == 0 else ""
+
+    def set_clipboard(self, text):
+        try:
+            subprocess.run(
+                ["xclip", "-selection", "clipboard", "-i"], env=self.env, input=text, text=True, check=True, timeout=2
+            )
+        except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            raise ClipboardError(str(e)) from e
+
+
+BACKENDS = {
+    "pyautogui": PyAutoGUIBackend,
+    "virtual": VirtualBackend,
+    "xvfb": XvfbBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name, **options):
+    """
+    Create a backend by name.
+
+    Args:
+        name (str): 'pyautogui', 'virtual' or 'xvfb'
+        **options: Arguments of the backend class
+
+    Returns:
+        InputBackend: The new backend
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown input backend: {name} (expected one of {', '.join(BACKENDS)})")
+    return BACKENDS[name](**options)
+
+
+def get_backend():
+    """
+    Get the backend used by the tools, creating the default one on first use.
+
+    Returns:
+        InputBackend: The current backend
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(os.getenv("INPUT_BACKEND", "pyautogui"))
+    return _backend
+
+
+def set_backend(backend):
+    """
+    Replace the backend used by the tools.
+
+    Args:
+        backend (InputBackend or str): Backend, or the name of one to create
+
+    Returns:
+        InputBackend: The previous backend, or None
+    """
+    global _backend
+    if isinstance(backend, str):
+        backend = create_backend(backend)
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    return previous
@@ -0,0 +1,201 @@
+"""
+History compaction - Bound the size of requests over long sessions
+
+Older screenshots in the message history are replaced by thumbnails or short
+text stubs, and optionally the oldest turns are folded into a running summary
+written by a cheap model. Providers apply a HistoryCompaction before every
+request; one instance can be shared by threads and sessions.
+"""
+
+from collections import OrderedDict
+import hashlib
+import io
+import threading
+
+from PIL import Image
+
+
+# Text put in place of screenshots dropped from the history
+SCREENSHOT_STUB = "[Earlier screenshot omitted]"
+
+# Instructions for the model that summarizes old turns
+SUMMARY_PROMPT = (
+    "Summarize the following steps of a computer use session in a few sentences. "
+    "Keep what was done, what was observed and anything still left to do."
+)
+
+
+# Rough token estimates, used for reporting only
+def estimate_text_tokens(text):
+    return len(text) // 4
+
+
+def estimate_image_tokens(width, height):
+    return (width * height) // 750
+
+
+class HistoryCompaction:
+    """
+    Bounds request size over long sessions by keeping only the latest screenshots at full resolution
+    """
+
+    def __init__(
+        self,
+        keep_full=3,
+        mode="thumbnail",
+        thumbnail_edge=384,
+        summarizer=None,
+        keep_turns=None,
+        cache_size=256,
+    ):
+        self.keep_full = keep_full  # Number of most recent screenshots kept as they are
+        self.mode = mode  # "thumbnail" or "stub" for older screenshots
+        self.thumbnail_edge = thumbnail_edge  # Long edge of thumbnails in pixels
+        self.summarizer = summarizer  # Optional cheap LLMProvider used to summarize old turns
+        self.keep_turns = keep_turns  # Number of most recent messages never summarized
+        self.cache_size = cache_size
+        self.replacements = OrderedDict()  # Replacement block and savings per image hash
+        self.summary = None  # (number of messages summarized, their fingerprint, summary text)
+        self.lock = threading.Lock()  # Guards the replacements, the summary and the stats
+        self.last_stats = self.empty_stats()  # Savings in the latest request
+        self.total_stats = self.empty_stats()  # Savings over all requests
+
+    @staticmethod
+    def empty_stats():
+        return {
+            "images_compacted": 0,
+            "messages_summarized": 0,
+            "bytes_saved": 0,
+            "tokens_saved": 0,
+        }
+
+    # Get the replacement for an old screenshot, computed once per distinct image
+    def replace_image(self, data):
+        key = (hashlib.blake2b(data, digest_size=16).digest(), self.mode)
+        with self.lock:
+            replacement = self.replacements.get(key)
+            if replacement is not None:
+                self.replacements.move_to_end(key)
+                return replacement
+
+        with Image.open(io.BytesIO(data)) as img:
+            size = img.size
+            if self.mode == "thumbnail":
+                thumbnail = img.convert("RGB")
+                thumbnail.thumbnail((self.thumbnail_edge, self.thumbnail_edge))
+                buffer = io.BytesIO()
+                thumbnail.save(buffer, format="JPEG", quality=70)
+                block = buffer.getvalue()
+                tokens_saved = estimate_image_tokens(*size) - estimate_image_tokens(
+                    *thumbnail.size
+                )
+            else:
+                block = SCREENSHOT_STUB
+                tokens_saved = estimate_image_tokens(*size) - estimate_text_tokens(block)
+
+        replacement = (block, len(data) - len(block), max(tokens_saved, 0))
+        with self.lock:
+            self.replacements[key] = replacement
+            while len(self.replacements) > self.cache_size:
+                self.replacements.popitem(last=False)
+        return replacement
+
+    # Render messages as plain text for the summarizer
+    @staticmethod
+    def transcript(messages):
+        lines = []
+        for message in messages:
+            content = message.get("content")
+            if isinstance(content, list):
+                content = " ".join(
+                    "[screenshot]" if isinstance(block, bytes) else str(block)
+                    for block in content
+                )
+            lines.append(f"{message.get('role', 'user')}: {content}")
+        return "\n".join(lines)
+
+    # Hash messages, including their screenshots, to tell whether a summary still describes them
+    @staticmethod
+    def fingerprint(messages):
+        digest = hashlib.blake2b(digest_size=16)
+        for message in messages:
+            content = message.get("content")
+            digest.update(str(message.get("role")).encode())
+            for block in content if isinstance(content, list) else [content]:
+                digest.update(b"\0" + (block if isinstance(block, bytes) else str(block).encode()))
+            digest.update(b"\1")
+        return digest.digest()
+
+    # Replace all but the most recent messages by a summary, recomputed in chunks of keep_turns.
+    # The summarizer is a blocking call; the async providers run compaction on a worker thread.
+    def summarize(self, messages, stats):
+        system = [msg for msg in messages if msg.get("role") == "system"]
+        history = [msg for msg in messages if msg.get("role") != "system"]
+        cutoff = (max(len(history) - self.keep_turns, 0) // self.keep_turns) * self.keep_turns
+        if cutoff == 0:
+            return messages
+
+        with self.lock:
+            done, fingerprint, summary = self.summary or (0, None, None)
+        # Start over if the messages summarized earlier are not a prefix of this history
+        if done and (done > cutoff or self.fingerprint(history[:done]) != fingerprint):
+            done, summary = 0, None
+        if cutoff > done:
+            # Fold the newly aged messages into the previous summary
+            text = self.transcript(history[done:cutoff])
+            if summary:
+                text = f"Summary so far: {summary}\n{text}"
+            summary = self.summarizer.call(
+                [{"role": "system", "content": SUMMARY_PROMPT}, {"role": "user", "content": text}]
+            )
+            # Keep the full history if the summarizer gave nothing back
+            if not isinstance(summary, str) or not summary.strip():
+                print("Warning: The summarizer returned no summary, history not summarized")
+                return messages
+            with self.lock:
+                self.summary = (cutoff, self.fingerprint(history[:cutoff]), summary)
+
+        old_text = self.transcript(history[:cutoff])
+        stats["messages_summarized"] += cutoff
+        stats["bytes_saved"] += len(old_text) - len(summary)
+        stats["tokens_saved"] += estimate_text_tokens(old_text) - estimate_text_tokens(summary)
+        summary_message = {"role": "user", "content": f"Summary of earlier steps: {summary}"}
+        return system + [summary_message] + history[cutoff:]
+
+    # Return a compacted copy of the messages, leaving the originals untouched
+    def compact(self, messages):
+        stats = self.empty_stats()
+
+        if self.summarizer and self.keep_turns:
+            messages = self.summarize(messages, stats)
+
+        # Find screenshots from newest to oldest and keep the first keep_full of them
+        seen = 0
+        compacted = list(messages)
+        for index in range(len(compacted) - 1, -1, -1):
+            content = compacted[index].get("content")
+            if not isinstance(content, list):
+                continue
+            new_content = list(content)
+            changed = False
+            for block_index in range(len(new_content) - 1, -1, -1):
+                block = new_content[block_index]
+                if not isinstance(block, bytes):
+                    continue
+                seen += 1
+                if seen <= self.keep_full:
+                    continue
+                replacement, bytes_saved, tokens_saved = self.replace_image(block)
+                new_content[block_index] = replacement
+                changed = True
+                stats["images_compacted"] += 1
+                stats["bytes_saved"] += bytes_saved
+                stats["tokens_saved"] += tokens_saved
+            if changed:
+                compacted[index] = {**compacted[index], "content": new_content}
+
+        with self.lock:
+            self.last_stats = stats
+            for name, value in stats.items():
+                self.total_stats[name] += value
+        return compacted
@@ -1,9 +1,11 @@
 # Define the models to use in the agent
 
 from os_computer_use import providers
+from os_computer_use.grounding import OSAtlasProvider
+# from os_computer_use.showui import ShowUIProvider
 
-grounding_model = providers.OSAtlasProvider()
-# grounding_model = providers.ShowUIProvider()
+grounding_model = OSAtlasProvider()
+# grounding_model = ShowUIProvider()
 
 # vision_model = providers.FireworksProvider("llama3.2")
 # vision_model = providers.OpenAIProvider("gpt-4o")
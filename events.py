@@ -0,0 +1,125 @@
+import atexit
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+
+class EventStream:
+    """
+    A non-blocking stream of structured events, written as JSONL and passed to consumers on a writer thread
+    """
+
+    # Number of screenshot hashes remembered; older screenshots are found on disk instead
+    max_stored = 4096
+
+    def __init__(self, path=None, screenshot_dir=None):
+        self.path = path  # Optional JSONL file receiving every event
+        self.screenshot_dir = screenshot_dir  # Content-addressed screenshot store, next to the JSONL file by default
+        self.consumers = []  # Callables receiving each event on the writer thread
+        self.step = 0  # Id of the current agent step
+        self.stored = OrderedDict()  # Hashes of the most recent screenshots already written
+        self.queue = queue.Queue()
+        self.thread = None
+        self.file = None  # Open handle to the JSONL file, reopened if the path changes
+        self.lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name="event-writer", daemon=True)
+                self.thread.start()
+
+    def subscribe(self, consumer):
+        self.consumers.append(consumer)
+
+    # Stop passing events to a consumer, once the events already queued have been handled
+    def unsubscribe(self, consumer):
+        self.flush()
+        if consumer in self.consumers:
+            self.consumers.remove(consumer)
+
+    # Start a new agent step, returning its id
+    def next_step(self):
+        with self.lock:
+            self.step += 1
+            return self.step
+
+    # Queue an event, returning immediately
+    def emit(self, event, **fields):
+        record = {"ts": time.time(), "step": self.step, "event": event, **fields}
+        self.start()
+        self.queue.put(record)
+        return record
+
+    # Block until every queued event has been handled
+    def flush(self):
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.join()
+
+    # Write a screenshot once under its SHA-256 hash and return the hash, or None without a screenshot store
+    def store_screenshot(self, data):
+        directory = self.screenshot_dir
+        if directory is None and self.path:
+            directory = os.path.join(os.path.dirname(self.path) or ".", "screenshots")
+        if not directory:
+            return None
+        if isinstance(data, str):
+            with open(data, "rb") as f:
+                data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest in self.stored:
+            self.stored.move_to_end(digest)
+            return digest
+        filepath = os.path.join(directory, digest[:2], digest)
+        if not os.path.exists(filepath):
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            with open(filepath, "wb") as f:
+                f.write(data)
+        self.stored[digest] = True
+        if len(self.stored) > self.max_stored:
+            self.stored.popitem(last=False)
+        return digest
+
+    # Replace raw screenshot bytes in an event by references to the screenshot store
+    def resolve_screenshots(self, record):
+        for name, value in record.items():
+            if isinstance(value, bytes):
+                record[name] = self.store_screenshot(value)
+            elif isinstance(value, list) and any(isinstance(item, bytes) for item in value):
+                record[name] = [
+                    self.store_screenshot(item) if isinstance(item, bytes) else item
+                    for item in value
+                ]
+        return record
+
+    def run(self):
+        while True:
+            record = self.queue.get()
+            try:
+                record = self.resolve_screenshots(record)
+                if self.path:
+                    if self.file is None or self.file.name != self.path:
+                        if self.file is not None:
+                            self.file.close()
+                        self.file = open(self.path, "a")
+                    self.file.write(json.dumps(record, default=str) + "\n")
+                    if self.queue.unfinished_tasks <= 1:
+                        self.file.flush()
+                for consumer in self.consumers:
+                    try:
+                        consumer(record)
+                    except Exception as e:
+                        print(f"Error in event consumer: {e}")
+            except Exception as e:
+                print(f"Error writing event: {e}")
+            finally:
+                self.queue.task_done()
+
+
+# Create a global event stream shared by the logger, providers and grounding models
+events = EventStream()
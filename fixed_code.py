@@ -1,10 +1,12 @@
 import os
 import openai
+from os_computer_use.transport import get_http_client
 
 # Initialize the client with Groq
 client = openai.OpenAI(
     base_url="https://api.groq.com/openai/v1",
-    api_key=os.environ.get("GROQ_API_KEY")
+    api_key=os.environ.get("GROQ_API_KEY"),
+    http_client=get_http_client("https://api.groq.com/openai/v1")
 )
 
 # Example instruction and operating system
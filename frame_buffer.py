@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Frame Buffer - Keep recent screenshots in memory
+
+This module provides a bounded in-memory ring buffer of recent frames with
+constant time access to the latest one. Frames can optionally be spilled to
+disk by a background writer thread, so saving a copy never blocks the caller
+until it needs the file (see Frame.wait_saved).
+
+Requirements:
+- pillow: pip install pillow
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+class BackgroundWriter:
+    """
+    Writes images and encoded bytes to disk on a single daemon thread.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        # The daemon thread is killed at exit, finish the queued writes first
+        atexit.register(self.flush)
+
+    def start(self):
+        """
+        Start the writer thread if it is not running yet.
+        """
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name="frame-writer", daemon=True
+                )
+                self.thread.start()
+
+    def run(self):
+        while True:
+            job, done = self.queue.get()
+            try:
+                job()
+            except Exception as e:
+                print(f"Error writing frame: {e}")
+            finally:
+                done.set()
+                self.queue.task_done()
+
+    def submit(self, job):
+        """
+        Queue a callable to run on the writer thread.
+
+        Args:
+            job (callable): Function taking no arguments
+
+        Returns:
+            threading.Event: Set once the job has finished
+        """
+        self.start()
+        done = threading.Event()
+        self.queue.put((job, done))
+        return done
+
+    def write(self, filepath, data):
+        """
+        Queue a write of an image or of already encoded bytes.
+
+        Args:
+            filepath (str): Destination path
+            data (PIL.Image or bytes): Image to save or bytes to write as-is
+
+        Returns:
+            threading.Event: Set once the file has been written
+        """
+
+        def job():
+            directory = os.path.dirname(filepath)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                with open(filepath, "wb") as f:
+                    f.write(data)
+            else:
+                data.save(filepath)
+            print(f"Screenshot saved: {filepath}")
+
+        return self.submit(job)
+
+    def remove(self, filepath):
+        """
+        Queue the removal of a file written earlier.
+
+        Args:
+            filepath (str): Path of the file to delete
+
+        Returns:
+            threading.Event: Set once the file has been removed
+        """
+
+        def job():
+            if os.path.exists(filepath):
+                os.remove(filepath)
+
+        return self.submit(job)
+
+    def flush(self):
+        """
+        Block until every queued write has finished.
+        """
+        if self.thread is not None:
+            self.queue.join()
+
+
+# Create a global writer shared by the screenshot helpers
+background_writer = BackgroundWriter()
+
+
+class Frame:
+    """
+    A captured screenshot together with its metadata.
+    """
+
+    def __init__(self, index, image, timestamp=None):
+        self.index = index  # Sequence number of the frame
+        self.image = image  # PIL image of the capture
+        self.timestamp = timestamp or time.time()  # Capture time
+        self.path = None  # File path if the frame was spilled to disk
+        self.saved = None  # Event set once the spilled file exists
+
+    def wait_saved(self, timeout=None):
+        """
+        Wait until the spilled copy of this frame is on disk.
+
+        Args:
+            timeout (float, optional): Seconds to wait at most
+
+        Returns:
+            bool: True if the file exists (or the frame was never spilled)
+        """
+        if self.saved is None:
+            return self.path is None
+        return self.saved.wait(timeout)
+
+
+class FrameBuffer:
+    """
+    Bounded ring buffer of recent frames with optional spill to disk.
+
+    Only the frames still in the buffer keep a file on disk: when a spilled
+    frame is evicted, its file is deleted by the writer thread.
+    """
+
+    def __init__(self, maxlen=8, directory="images", writer=None):
+        self.frames = deque(maxlen=maxlen)
+        self.directory = directory
+        self.writer = writer or background_writer
+        self.frame_count = 0
+        self.last_spilled = None  # Most recent frame written to disk
+        self.lock = threading.Lock()
+
+    def push(self, image, spill=False):
+        """
+        Add a frame to the buffer.
+
+        Args:
+            image (PIL.Image): Captured screenshot
+            spill (bool): Whether to also write the frame to disk in the background
+
+        Returns:
+            Frame: The stored frame
+        """
+        with self.lock:
+            self.frame_count += 1
+            frame = Frame(self.frame_count, image)
+            if len(self.frames) == self.frames.maxlen:
+                evicted = self.frames[0]
+                if evicted.path:
+                    self.writer.remove(evicted.path)
+            self.frames.append(frame)
+
+        if spill:
+            self.spill(frame)
+        return frame
+
+    def spill(self, frame):
+        """
+        Write a frame to disk on the background writer thread.
+
+        Args:
+            frame (Frame): Frame to write
+
+        Returns:
+            str: Path the frame is being written to
+        """
+        if frame.path is None:
+            timestamp = datetime.fromtimestamp(frame.timestamp).strftime("%Y%m%d_%H%M%S")
+            filename = f"screenshot_{timestamp}_{frame.index:04d}.png"
+            frame.path = os.path.join(self.directory, filename)
+            frame.saved = self.writer.write(frame.path, frame.image)
+            with self.lock:
+                self.last_spilled = frame
+        return frame.path
+
+    def latest(self):
+        """
+        Get the most recent frame.
+
+        Returns:
+            Frame: The newest frame or None if the buffer is empty
+        """
+        with self.lock:
+            return self.frames[-1] if self.frames else None
+
+    def latest_path(self):
+        """
+        Get the path of the most recent frame written to disk.
+
+        Waits until the background write of that frame has finished, so the
+        returned file can be opened right away.
+
+        Returns:
+            str: Path to the newest spilled frame or None
+        """
+        with self.lock:
+            frame = self.last_spilled
+            if frame is None or frame.index < self.frames[0].index:
+                return None
+        frame.wait_saved()
+        return frame.path
+
+    def get(self, index):
+        """
+        Get a frame by its sequence number.
+
+        Args:
+            index (int): Frame number returned by an earlier push()
+
+        Returns:
+            Frame: The frame or None if it has been evicted
+        """
+        with self.lock:
+            if not self.frames:
+                return None
+            position = index - self.frames[0].index
+            if 0 <= position < len(self.frames):
+                return self.frames[position]
+            return None
+
+    def clear(self):
+        """
+        Drop every frame and delete their files.
+        """
+        with self.lock:
+            frames = list(self.frames)
+            self.frames.clear()
+            self.last_spilled = None
+        for frame in frames:
+            if frame.path:
+                self.writer.remove(frame.path)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Frame Dedup - Detect screenshots that are unchanged since an earlier frame
+
+This module computes a cheap downsampled signature of every capture and
+compares it against the last distinct frame of the same region. Frames whose
+signatures match are confirmed pixel by pixel at full resolution, since a
+change as small as one character can vanish in the downsampled signature of a
+large screen. When nothing on screen changed,
+callers get a short SameFrame marker instead of another full image, which can
+be sent to a model as a text note in place of the image bytes. Distinct frames
+are returned as NewFrame strings carrying their frame number.
+
+Requirements:
+- pillow: pip install pillow
+"""
+
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageChops
+
+# Size of the grayscale thumbnail used to compare frames
+SIGNATURE_SIZE = (160, 100)
+
+# Largest per-pixel difference (0-255) on the thumbnail still treated as "unchanged"
+DEFAULT_TOLERANCE = 8
+
+# Number of regions whose last distinct frame is kept
+MAX_REGIONS = 4
+
+
+class SameFrame(str):
+    """
+    Marker returned in place of image data when a frame is a duplicate.
+
+    It is a string holding a short note for the model, so it can be placed in a
+    message content list and gets wrapped as a text block by the providers.
+    """
+
+    def __new__(cls, frame):
+        note = f"[Screen unchanged since the last screenshot (frame {frame})]"
+        instance = super().__new__(cls, note)
+        instance.frame = frame
+        return instance
+
+
+class NewFrame(str):
+    """
+    Image data of a distinct frame, carrying the number later SameFrame markers refer to.
+
+    It behaves as the plain base64 string; callers that label images for the
+    model can read the frame attribute.
+    """
+
+    def __new__(cls, data, frame):
+        instance = super().__new__(cls, data)
+        instance.frame = frame
+        return instance
+
+
+def frame_signature(image, size=SIGNATURE_SIZE):
+    """
+    Compute a downsampled grayscale signature of an image.
+
+    Args:
+        image (PIL.Image): Full resolution screenshot
+        size (tuple): Size (width, height) of the signature thumbnail
+
+    Returns:
+        PIL.Image: Grayscale thumbnail used for comparisons
+    """
+    return image.convert("L").resize(size, Image.BILINEAR)
+
+
+def frames_match(signature_a, signature_b, tolerance=DEFAULT_TOLERANCE):
+    """
+    Check whether two frame signatures show the same screen.
+
+    Args:
+        signature_a (PIL.Image): Signature from frame_signature()
+        signature_b (PIL.Image): Signature from frame_signature()
+        tolerance (int): Largest per-pixel difference treated as unchanged
+
+    Returns:
+        bool: True if no pixel differs by more than the tolerance
+    """
+    if signature_a is None or signature_b is None:
+        return False
+    if signature_a.size != signature_b.size:
+        return False
+    _, max_difference = ImageChops.difference(signature_a, signature_b).getextrema()
+    return max_difference <= tolerance
+
+
+def images_match(image_a, image_b, tolerance=DEFAULT_TOLERANCE):
+    """
+    Check whether two grayscale images of the same size match at full resolution.
+
+    Args:
+        image_a (PIL.Image): Grayscale image
+        image_b (PIL.Image): Grayscale image
+        tolerance (int): Largest per-pixel difference treated as unchanged
+
+    Returns:
+        bool: True if no pixel differs by more than the tolerance
+    """
+    if image_a.size != image_b.size:
+        return False
+    _, max_difference = ImageChops.difference(image_a, image_b).getextrema()
+    return max_difference <= tolerance
+
+
+class FrameDeduplicator:
+    """
+    Tracks the last distinct frame of each captured region and reports duplicates of it.
+    """
+
+    def __init__(self, tolerance=DEFAULT_TOLERANCE, max_regions=MAX_REGIONS):
+        self.tolerance = tolerance
+        self.max_regions = max_regions
+        self.frame_count = 0  # Number of frames seen so far
+        self.last = OrderedDict()  # Region -> (number, signature, grayscale image) of its last distinct frame
+        self.lock = threading.Lock()
+
+    def check(self, image, region=None):
+        """
+        Register a new frame and compare it with the last distinct one of the same region.
+
+        Args:
+            image (PIL.Image): Newly captured screenshot
+            region (tuple, optional): Region the screenshot was taken of (left, top, width, height),
+                                      None for the full screen
+
+        Returns:
+            tuple: (frame, duplicate_of) where frame is the number assigned to
+                   this capture and duplicate_of is the number of the matching
+                   earlier frame, or None if the screen changed
+        """
+        key = tuple(region) if region is not None else None
+        gray = image.convert("L")
+        signature = gray.resize(SIGNATURE_SIZE, Image.BILINEAR)
+        with self.lock:
+            self.frame_count += 1
+            frame = self.frame_count
+            last = self.last.get(key)
+
+        # The signature rules out most changes cheaply, matches are confirmed at full resolution
+        if (
+            last is not None
+            and frames_match(signature, last[1], self.tolerance)
+            and images_match(gray, last[2], self.tolerance)
+        ):
+            return frame, last[0]
+
+        with self.lock:
+            self.last[key] = (frame, signature, gray)
+            self.last.move_to_end(key)
+            while len(self.last) > self.max_regions:
+                self.last.popitem(last=False)
+        return frame, None
+
+    def reset(self):
+        """
+        Forget the last distinct frames so the next capture is always sent.
+        """
+        with self.lock:
+            self.last.clear()
+
+
+# Create a global deduplicator shared by the screenshot helpers
+frame_dedup = FrameDeduplicator()
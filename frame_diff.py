@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Frame Diff - Find the regions of the screen that changed between captures
+
+This module splits consecutive screenshots into tiles, compares them with
+NumPy and reports bounding boxes of the changed regions. It can crop a frame
+down to the changed area and remembers the crop offset, so coordinates found
+on the crop (e.g. by a grounding model) map back to full-screen space.
+
+Requirements:
+- pillow: pip install pillow
+- numpy: pip install numpy
+"""
+
+import io
+import os
+import tempfile
+import numpy as np
+from PIL import ImageChops
+
+# Side length in pixels of the square tiles that are compared
+DEFAULT_TILE_SIZE = 32
+
+# Smallest pixel difference (0-255) that marks a tile as changed
+DEFAULT_THRESHOLD = 12
+
+# Extra margin in pixels kept around changed regions when cropping
+DEFAULT_PADDING = 16
+
+# Above this fraction of the screen changed, the full frame is sent instead of a crop
+DEFAULT_MAX_FRACTION = 0.6
+
+
+def changed_tiles(previous, current, tile_size=DEFAULT_TILE_SIZE, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare two frames tile by tile.
+
+    Args:
+        previous (PIL.Image): Earlier frame
+        current (PIL.Image): Later frame of the same size
+        tile_size (int): Side length of a tile in pixels
+        threshold (int): Smallest pixel difference that counts as a change
+
+    Returns:
+        numpy.ndarray: Boolean grid of shape (rows, cols), True where a tile changed
+    """
+    if previous.size != current.size:
+        raise ValueError(f"Frame sizes differ: {previous.size} and {current.size}")
+
+    # The absolute difference is computed by Pillow, the tile reduction by NumPy
+    difference = ImageChops.difference(previous.convert("RGB"), current.convert("RGB"))
+    pixels = np.asarray(difference.convert("L"))
+
+    height, width = pixels.shape
+    rows = -(-height // tile_size)
+    cols = -(-width // tile_size)
+    padded = np.zeros((rows * tile_size, cols * tile_size), dtype=pixels.dtype)
+    padded[:height, :width] = pixels
+
+    tiles = padded.reshape(rows, tile_size, cols, tile_size).max(axis=(1, 3))
+    return tiles > threshold
+
+
+def _tile_components(grid):
+    # Group changed tiles into 8-connected components, returned as tile bounding boxes
+    visited = np.zeros_like(grid, dtype=bool)
+    rows, cols = grid.shape
+    components = []
+
+    for start_row, start_col in zip(*np.nonzero(grid)):
+        if visited[start_row, start_col]:
+            continue
+        visited[start_row, start_col] = True
+        stack = [(start_row, start_col)]
+        top, left, bottom, right = start_row, start_col, start_row, start_col
+
+        while stack:
+            row, col = stack.pop()
+            top, bottom = min(top, row), max(bottom, row)
+            left, right = min(left, col), max(right, col)
+            for next_row in range(max(row - 1, 0), min(row + 2, rows)):
+                for next_col in range(max(col - 1, 0), min(col + 2, cols)):
+                    if grid[next_row, next_col] and not visited[next_row, next_col]:
+                        visited[next_row, next_col] = True
+                        stack.append((next_row, next_col))
+
+        components.append((top, left, bottom, right))
+
+    return components
+
+
+def changed_regions(previous, current, tile_size=DEFAULT_TILE_SIZE, threshold=DEFAULT_THRESHOLD):
+    """
+    Get the bounding boxes of the regions that changed between two frames.
+
+    Args:
+        previous (PIL.Image): Earlier frame
+        current (PIL.Image): Later frame of the same size
+        tile_size (int): Side length of a tile in pixels
+        threshold (int): Smallest pixel difference that counts as a change
+
+    Returns:
+        list: Changed regions as (left, top, width, height) tuples in pixels
+    """
+    grid = changed_tiles(previous, current, tile_size, threshold)
+    width, height = current.size
+
+    regions = []
+    for top, left, bottom, right in _tile_components(grid):
+        x0, y0 = left * tile_size, top * tile_size
+        x1 = min((right + 1) * tile_size, width)
+        y1 = min((bottom + 1) * tile_size, height)
+        regions.append((int(x0), int(y0), int(x1 - x0), int(y1 - y0)))
+    return regions
+
+
+def union_region(regions):
+    """
+    Get the smallest region containing all given regions.
+
+    Args:
+        regions (list): Regions as (left, top, width, height) tuples
+
+    Returns:
+        tuple: (left, top, width, height) or None if regions is empty
+    """
+    if not regions:
+        return None
+    left = min(r[0] for r in regions)
+    top = min(r[1] for r in regions)
+    right = max(r[0] + r[2] for r in regions)
+    bottom = max(r[1] + r[3] for r in regions)
+    return left, top, right - left, bottom - top
+
+
+class CroppedFrame:
+    """
+    A crop of a full-screen frame that remembers where it came from.
+    """
+
+    def __init__(self, image, offset=(0, 0), screen_size=None):
+        self.image = image  # Cropped PIL image
+        self.offset = offset  # (x, y) of the crop's top-left corner on the screen
+        self.screen_size = screen_size or image.size  # Size of the full frame
+        self.path = None  # File written by save() with an explicit path
+
+    @property
+    def is_full_frame(self):
+        return self.offset == (0, 0) and self.image.size == tuple(self.screen_size)
+
+    def to_screen(self, point):
+        """
+        Map a point on the crop to full-screen coordinates.
+
+        Args:
+            point (tuple): (x, y) on the cropped image, or None
+
+        Returns:
+            tuple: (x, y) on the full screen, or None if point is None
+        """
+        if point is None:
+            return None
+        return point[0] + self.offset[0], point[1] + self.offset[1]
+
+    def note(self):
+        """
+        Describe the crop for a vision model.
+
+        Returns:
+            str: Text note giving the crop's position on the screen
+        """
+        if self.is_full_frame:
+            return f"Full screen ({self.screen_size[0]}x{self.screen_size[1]})."
+        width, height = self.image.size
+        return (
+            f"Only the changed part of the screen is shown: a {width}x{height} region "
+            f"at offset ({self.offset[0]}, {self.offset[1]}) of the "
+            f"{self.screen_size[0]}x{self.screen_size[1]} screen."
+        )
+
+    def to_bytes(self, format="PNG"):
+        """
+        Encode the cropped image.
+
+        Args:
+            format (str): Image format (PNG, JPEG, etc.)
+
+        Returns:
+            bytes: Encoded image
+        """
+        buffer = io.BytesIO()
+        self.image.save(buffer, format=format)
+        return buffer.getvalue()
+
+    def to_content(self, format="PNG"):
+        """
+        Build message content blocks for a vision model.
+
+        Returns:
+            list: The offset note followed by the encoded crop
+        """
+        return [self.note(), self.to_bytes(format)]
+
+    def save(self, filepath=None):
+        """
+        Write the crop to a file, e.g. for upload to a grounding model.
+
+        Args:
+            filepath (str, optional): Destination path. If None, a new temporary file
+                                      is written, which the caller must remove.
+
+        Returns:
+            str: Path to the written file
+        """
+        if filepath is None:
+            handle, temporary_path = tempfile.mkstemp(prefix="crop_", suffix=".png")
+            with os.fdopen(handle, "wb") as f:
+                self.image.save(f, format="PNG")
+            return temporary_path
+        self.image.save(filepath)
+        self.path = filepath
+        return filepath
+
+
+def crop_changes(
+    previous,
+    current,
+    tile_size=DEFAULT_TILE_SIZE,
+    threshold=DEFAULT_THRESHOLD,
+    padding=DEFAULT_PADDING,
+    max_fraction=DEFAULT_MAX_FRACTION,
+):
+    """
+    Crop the current frame down to the area that changed since the previous one.
+
+    Args:
+        previous (PIL.Image): Earlier frame, or None to use the full current frame
+        current (PIL.Image): Later frame
+        tile_size (int): Side length of a tile in pixels
+        threshold (int): Smallest pixel difference that counts as a change
+        padding (int): Margin in pixels kept around the changed area
+        max_fraction (float): If more of the screen changed, the full frame is returned
+
+    Returns:
+        CroppedFrame: Crop of the changed area, the full frame, or None if nothing changed
+    """
+    width, height = current.size
+    if previous is None or previous.size != current.size:
+        return CroppedFrame(current)
+
+    region = union_region(changed_regions(previous, current, tile_size, threshold))
+    if region is None:
+        return None
+
+    left = max(region[0] - padding, 0)
+    top = max(region[1] - padding, 0)
+    right = min(region[0] + region[2] + padding, width)
+    bottom = min(region[1] + region[3] + padding, height)
+
+    if (right - left) * (bottom - top) > max_fraction * width * height:
+        return CroppedFrame(current)
+
+    crop = current.crop((left, top, right, bottom))
+    return CroppedFrame(crop, offset=(left, top), screen_size=current.size)
+
+
+class FrameDiffer:
+    """
+    Keeps the previous frame and crops each new one to what changed.
+    """
+
+    def __init__(self, **options):
+        self.options = options  # Keyword arguments passed to crop_changes()
+        self.previous = None
+
+    def update(self, image):
+        """
+        Register a new frame.
+
+        Args:
+            image (PIL.Image): Newly captured screenshot
+
+        Returns:
+            CroppedFrame: Crop of the changed area, the full frame for the first
+                          capture, or None if nothing changed
+        """
+        cropped = crop_changes(self.previous, image, **self.options)
+        self.previous = image
+        return cropped
+
+    def reset(self):
+        """
+        Forget the previous frame so the next one is sent in full.
+        """
+        self.previous = None
@@ -1,11 +1,16 @@
 #taken from https://github.com/e2b-dev/open-computer-use/blob/master/os_computer_use/grounding.py
 
-from PIL import ImageDraw
+from PIL import Image, ImageDraw
 import re
 import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from gradio_client import Client, handle_file
 from os_computer_use.logging import logger
-from os_computer_use.grounding import extract_bbox_midpoint
+from os_computer_use.frame_diff import CroppedFrame
+from os_computer_use.image import prepare_image
+from os_computer_use.tracing import span, traced
 OSATLAS_HUGGINGFACE_SOURCE = "maxiw/OS-ATLAS"
 OSATLAS_HUGGINGFACE_MODEL = "OS-Copilot/OS-Atlas-Base-7B"
 OSATLAS_HUGGINGFACE_API = "/run_example"
@@ -38,17 +43,176 @@ class OSAtlasProvider:
     The OS-Atlas provider is used to make calls to OS-Atlas.
     """
 
-    def __init__(self):
+    def __init__(self, image_options=None, cache=None, relocator=None):
         self.client = Client(OSATLAS_HUGGINGFACE_SOURCE, hf_token=HF_TOKEN)
+        # Downscale options passed to prepare_image before uploading, e.g. {"max_long_edge": 1280}.
+        # A screen_size option maps returned positions to screen coordinates, e.g. points on Retina screens.
+        self.image_options = image_options
+        # Optional GroundingCache consulted before calling the remote model
+        self.cache = cache
+        # Optional TemplateRelocator that finds known elements again by template matching
+        self.relocator = relocator
 
-    def call(self, prompt, image_data):
-        result = self.client.predict(
-            image=handle_file(image_data),
-            text_input=prompt + "\nReturn the response in the form of a bbox",
-            model_id=OSATLAS_HUGGINGFACE_MODEL,
-            api_name=OSATLAS_HUGGINGFACE_API,
+    # Get the file to upload and a function mapping positions on it back to pixels of the full screenshot
+    def prepare_input(self, image_data):
+        # A cropped frame is uploaded on its own and the result shifted back to the full frame
+        crop = image_data if isinstance(image_data, CroppedFrame) else None
+        options = {
+            name: value for name, value in (self.image_options or {}).items() if name != "screen_size"
+        }
+
+        if not options or (crop is None and not os.path.isfile(image_data)):
+            if crop is None:
+                return image_data, lambda point: point, False
+            # Reuse a file the crop was already saved to, otherwise write a temporary one
+            if crop.path is not None:
+                return crop.path, crop.to_screen, False
+            return crop.save(), crop.to_screen, True
+
+        if crop is not None:
+            prepared = prepare_image(crop.image, **options)
+        else:
+            with Image.open(image_data) as image:
+                prepared = prepare_image(image, **options)
+        handle, path = tempfile.mkstemp(prefix="grounding_", suffix="." + prepared.format.lower())
+        with os.fdopen(handle, "wb") as f:
+            f.write(prepared.data)
+
+        def to_image(point):
+            point = prepared.to_screen(point)
+            return crop.to_screen(point) if crop is not None else point
+
+        return path, to_image, True
+
+    # Map a position on a full screenshot of the given size to screen coordinates
+    def to_screen(self, point, frame_size):
+        screen_size = (self.image_options or {}).get("screen_size")
+        if point is None or not screen_size or frame_size is None:
+            return point
+        return (
+            round(point[0] * screen_size[0] / frame_size[0]),
+            round(point[1] * screen_size[1] / frame_size[1]),
         )
-        position = extract_bbox_midpoint(result[1])
+
+    # Size of the full screenshot behind the input, if known
+    def frame_size(self, image_data, image=None):
+        if isinstance(image_data, CroppedFrame):
+            return image_data.screen_size
+        if image is not None:
+            return image.size
+        if isinstance(image_data, str) and os.path.isfile(image_data):
+            with Image.open(image_data) as frame:
+                return frame.size
+        return None
+
+    # Try to find the element without the remote model, from the cache or by template matching.
+    # The cache and the relocator work on screenshot pixels, positions are mapped to the screen by the caller.
+    @traced("grounding.local")
+    def find_locally(self, prompt, image):
+        if self.cache is not None:
+            position = self.cache.lookup(prompt, image)
+            if position is not None:
+                logger.log(f"grounding cache hit for '{prompt}'", "gray")
+                return position
+        if self.relocator is not None:
+            position, score = self.relocator.locate(prompt, image)
+            if position is not None:
+                logger.log(f"relocated '{prompt}' locally (score {score:.2f})", "gray")
+                if self.cache is not None:
+                    self.cache.store(prompt, image, position)
+                return position
+        return None
+
+    # Remember a remote grounding result for later local lookups
+    def remember(self, prompt, image, position):
+        if self.cache is not None:
+            self.cache.store(prompt, image, position)
+        if self.relocator is not None:
+            self.relocator.remember(prompt, image, position)
+
+    # Open full screenshots given as a file, so they can be resolved locally
+    def open_for_lookup(self, image_data):
+        has_local = self.cache is not None or self.relocator is not None
+        if has_local and isinstance(image_data, str) and os.path.isfile(image_data):
+            # Read the pixels and close the file right away
+            with Image.open(image_data) as image:
+                image.load()
+            return image
+        return None
+
+    # Ground a prompt with the remote model on an already prepared file, returning screenshot pixels
+    def predict(self, prompt, path, to_image):
+        start = time.perf_counter()
+        with span("grounding.network", prompt=prompt):
+            result = self.client.predict(
+                image=handle_file(path),
+                text_input=prompt + "\nReturn the response in the form of a bbox",
+                model_id=OSATLAS_HUGGINGFACE_MODEL,
+                api_name=OSATLAS_HUGGINGFACE_API,
+            )
+        position = to_image(extract_bbox_midpoint(result[1]))
         image_url = result[2]
-        logger.log(f"bbox {image_url}", "gray")
-        return position
\ No newline at end of file
+        logger.log(
+            f"bbox {image_url}",
+            "gray",
+            event="grounding",
+            provider=self.__class__.__name__,
+            prompt=prompt,
+            position=position,
+            latency=time.perf_counter() - start,
+        )
+        return position
+
+    @traced("OSAtlasProvider.call")
+    def call(self, prompt, image_data):
+        image = self.open_for_lookup(image_data)
+        frame_size = self.frame_size(image_data, image)
+        if image is not None:
+            position = self.find_locally(prompt, image)
+            if position is not None:
+                return self.to_screen(position, frame_size)
+
+        path, to_image, is_temporary = self.prepare_input(image_data)
+        try:
+            position = self.predict(prompt, path, to_image)
+        finally:
+            if is_temporary:
+                os.remove(path)
+        if image is not None:
+            self.remember(prompt, image, position)
+        return self.to_screen(position, frame_size)
+
+    # Ground several prompts on the same screenshot concurrently, returning positions in order
+    @traced("OSAtlasProvider.call_many")
+    def call_many(self, prompts, image_data, max_workers=4):
+        positions = [None] * len(prompts)
+        image = self.open_for_lookup(image_data)
+        frame_size = self.frame_size(image_data, image)
+
+        remote = []
+        for index, prompt in enumerate(prompts):
+            position = self.find_locally(prompt, image) if image is not None else None
+            if position is None:
+                remote.append(index)
+            positions[index] = position
+
+        if not remote:
+            return [self.to_screen(position, frame_size) for position in positions]
+
+        # The frame is cropped and downscaled once and shared by all requests
+        path, to_image, is_temporary = self.prepare_input(image_data)
+        try:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(remote))) as executor:
+                results = executor.map(
+                    lambda index: self.predict(prompts[index], path, to_image), remote
+                )
+                for index, position in zip(remote, results):
+                    positions[index] = position
+        finally:
+            if is_temporary:
+                os.remove(path)
+
+        if image is not None:
+            for index in remote:
+                self.remember(prompts[index], image, positions[index])
+        return [self.to_screen(position, frame_size) for position in positions]
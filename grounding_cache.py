@@ -0,0 +1,186 @@
+from collections import OrderedDict
+import atexit
+import base64
+import json
+import os
+import re
+import threading
+import time
+
+from PIL import Image
+
+from os_computer_use.frame_dedup import frame_signature, frames_match
+from os_computer_use.frame_diff import changed_regions
+
+
+# Size of the grayscale signature taken around a grounded position
+REGION_SIGNATURE_SIZE = (32, 32)
+
+
+# Normalize an element description so case, punctuation and spacing differences still match
+def normalize_prompt(prompt):
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", prompt.lower())).strip()
+
+
+class GroundingCache:
+    """
+    Caches grounding results by prompt, valid as long as the screen around the grounded position is unchanged
+    """
+
+    def __init__(self, max_entries=256, max_age=900, region_radius=48, tolerance=8, path=None, save_delay=1.0):
+        self.max_entries = max_entries  # Largest number of cached prompts
+        self.max_age = max_age  # Seconds after which an entry expires
+        self.region_radius = region_radius  # Half size in pixels of the area compared around a hit
+        self.tolerance = tolerance  # Largest pixel difference still treated as unchanged
+        self.path = path  # Optional JSON file that keeps entries across restarts
+        self.save_delay = save_delay  # Seconds by which writes to the file are batched
+        self.save_timer = None  # Pending background save
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()  # Serializes writes to the file
+        self.stats = {"hits": 0, "misses": 0, "stale": 0}
+        if path:
+            if os.path.exists(path):
+                self.load()
+            # The pending save runs on a daemon thread, write it before exiting
+            atexit.register(self.flush)
+
+    # Signature of the screen area around a position
+    def region_signature(self, image, position):
+        x, y = position
+        box = (
+            max(int(x) - self.region_radius, 0),
+            max(int(y) - self.region_radius, 0),
+            min(int(x) + self.region_radius, image.width),
+            min(int(y) + self.region_radius, image.height),
+        )
+        return frame_signature(image.crop(box), REGION_SIGNATURE_SIZE)
+
+    # Get the cached position for a prompt if the screen around it has not changed
+    def lookup(self, prompt, image):
+        key = normalize_prompt(prompt)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            if time.time() - entry["time"] > self.max_age or tuple(entry["size"]) != image.size:
+                del self.entries[key]
+                self.stats["stale"] += 1
+                return None
+
+        signature = self.region_signature(image, entry["position"])
+        if not frames_match(signature, entry["signature"], self.tolerance):
+            with self.lock:
+                self.entries.pop(key, None)
+                self.stats["stale"] += 1
+            return None
+
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+        return tuple(entry["position"])
+
+    # Remember where an element was found on a screenshot
+    def store(self, prompt, image, position):
+        if position is None:
+            return
+        entry = {
+            "position": tuple(position),
+            "size": image.size,
+            "signature": self.region_signature(image, position),
+            "time": time.time(),
+        }
+        key = normalize_prompt(prompt)
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        if self.path:
+            self.schedule_save()
+
+    # Drop entries whose position lies in one of the given (left, top, width, height) regions
+    def invalidate_regions(self, regions):
+        with self.lock:
+            stale = [
+                key
+                for key, entry in self.entries.items()
+                if any(
+                    left <= entry["position"][0] < left + width
+                    and top <= entry["position"][1] < top + height
+                    for left, top, width, height in regions
+                )
+            ]
+            for key in stale:
+                del self.entries[key]
+            self.stats["stale"] += len(stale)
+        return len(stale)
+
+    # Drop entries in the areas that the frame diff reports as changed
+    def invalidate_changes(self, previous, current):
+        if previous is None or previous.size != current.size:
+            return self.clear()
+        return self.invalidate_regions(changed_regions(previous, current))
+
+    def clear(self):
+        with self.lock:
+            count = len(self.entries)
+            self.entries.clear()
+        return count
+
+    # Save in the background after save_delay, so that a burst of stores is written once
+    def schedule_save(self):
+        with self.lock:
+            if self.save_timer is not None:
+                return
+            self.save_timer = threading.Timer(self.save_delay, self.save)
+            self.save_timer.daemon = True
+            self.save_timer.start()
+
+    # Write the pending changes now, e.g. before exiting
+    def flush(self):
+        with self.lock:
+            timer, self.save_timer = self.save_timer, None
+        if timer is not None:
+            timer.cancel()
+            self.save()
+
+    # Write all entries to the JSON file, replacing it atomically
+    def save(self):
+        with self.lock:
+            # Stores from now on schedule another save
+            self.save_timer = None
+            data = {
+                key: {
+                    "position": entry["position"],
+                    "size": entry["size"],
+                    "signature": base64.b64encode(entry["signature"].tobytes()).decode("ascii"),
+                    "time": entry["time"],
+                }
+                for key, entry in self.entries.items()
+            }
+        temporary_path = f"{self.path}.tmp"
+        with self.save_lock:
+            with open(temporary_path, "w") as f:
+                json.dump(data, f)
+            os.replace(temporary_path, self.path)
+
+    # Read entries saved by an earlier run, skipping expired ones
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load grounding cache: {e}")
+            return
+        now = time.time()
+        with self.lock:
+            for key, entry in data.items():
+                if now - entry["time"] > self.max_age:
+                    continue
+                signature = Image.frombytes(
+                    "L", REGION_SIGNATURE_SIZE, base64.b64decode(entry["signature"])
+                )
+                self.entries[key] = {**entry, "signature": signature}
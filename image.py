@@ -3,7 +3,8 @@
 Image Utilities - Functions for working with images
 
 This module provides utility functions for working with images,
-including converting images to base64 encoded strings.
+including converting images to base64 encoded strings and preparing
+downscaled screenshots for upload to models.
 """
 
 import os
@@ -120,6 +121,93 @@ def pil_image_to_base64(pil_image, format='PNG'):
     except Exception as e:
         raise Exception(f"Error converting PIL image to base64: {str(e)}")
 
+# Mapping image formats to MIME subtypes
+MIME_SUBTYPES = {'PNG': 'png', 'JPEG': 'jpeg', 'WEBP': 'webp', 'GIF': 'gif', 'BMP': 'bmp'}
+
+class PreparedImage:
+    """
+    An encoded image ready to send to a model, with the transform back to screen space.
+    """
+    
+    def __init__(self, data, format, size, scale=(1.0, 1.0)):
+        self.data = data  # Encoded image bytes
+        self.format = format  # Image format (PNG, JPEG or WEBP)
+        self.size = size  # (width, height) of the encoded image
+        self.scale = scale  # Screen pixels per image pixel along (x, y)
+    
+    @property
+    def mime_type(self):
+        return f"image/{MIME_SUBTYPES.get(self.format, self.format.lower())}"
+    
+    def to_screen(self, point):
+        """
+        Map a point on the prepared image back to screen coordinates.
+        
+        Args:
+            point (tuple): (x, y) on the prepared image, or None
+            
+        Returns:
+            tuple: (x, y) on the screen, or None if point is None
+        """
+        if point is None:
+            return None
+        return point[0] * self.scale[0], point[1] * self.scale[1]
+
+def prepare_image(image, max_long_edge=None, format='PNG', quality=None, screen_size=None):
+    """
+    Downscale and re-encode an image for upload to a model.
+    
+    Args:
+        image (PIL.Image or bytes): Image or encoded image bytes
+        max_long_edge (int, optional): Largest allowed width or height in pixels.
+                                       The image is not resized if None.
+        format (str): Output format (PNG, JPEG or WEBP)
+        quality (int, optional): Encoder quality for JPEG and WEBP
+        screen_size (tuple, optional): Size of the screen coordinates map back to.
+                                       Defaults to the size of the input image.
+        
+    Returns:
+        PreparedImage: Encoded image with its scale transform
+        
+    Raises:
+        Exception: For errors during conversion
+    """
+    try:
+        format = format.upper()
+        if format == 'JPG':
+            format = 'JPEG'
+        
+        source = image
+        if isinstance(image, (bytes, bytearray)):
+            source = Image.open(io.BytesIO(image))
+        
+        width, height = source.size
+        screen_width, screen_height = screen_size or source.size
+        
+        target = source
+        long_edge = max(width, height)
+        if max_long_edge and long_edge > max_long_edge:
+            ratio = max_long_edge / long_edge
+            target_size = (max(round(width * ratio), 1), max(round(height * ratio), 1))
+            target = source.resize(target_size, Image.LANCZOS)
+        
+        # Reuse the original bytes when nothing would change
+        if target is source and isinstance(image, (bytes, bytearray)) and source.format == format and quality is None:
+            data = bytes(image)
+        else:
+            if format == 'JPEG' and target.mode not in ('RGB', 'L'):
+                target = target.convert('RGB')
+            buffer = io.BytesIO()
+            options = {'quality': quality} if quality is not None else {}
+            target.save(buffer, format=format, **options)
+            data = buffer.getvalue()
+        
+        scale = (screen_width / target.width, screen_height / target.height)
+        return PreparedImage(data, format, target.size, scale)
+    
+    except Exception as e:
+        raise Exception(f"Error preparing image: {str(e)}")
+
 # Example usage
 if __name__ == "__main__":
     # Example: Convert an image to base64
@@ -1,4 +1,9 @@
 import os
+import json
+import itertools
+from collections import deque
+
+from os_computer_use.events import events
 
 
 # A logger to write to the console and a log file in color
@@ -30,9 +35,23 @@ class Logger:
         "gray": ("#666666", "#f5f5f5"),
     }
 
-    def __init__(self):
-        self.logs = []  # Output logs
-        self.log_file = None  # Output log file
+    # Number of log entries kept in memory
+    max_logs = 1000
+
+    # Ids telling apart the loggers sharing an event stream
+    ids = itertools.count(1)
+
+    def __init__(self, event_stream=None):
+        # Log lines go through the event stream, which writes them to the HTML file. They are printed
+        # right away, so that they stay in order with other console output.
+        # Each logger only writes its own lines, so that loggers sharing a stream do not repeat each other.
+        self.id = next(self.ids)
+        self.events = event_stream or events
+        self.events.subscribe(self.consume)
+        self.logs = deque(maxlen=self.max_logs)  # Most recent output logs
+        self.spill_file = None  # Optional JSONL file receiving entries evicted from self.logs
+        self._log_file = None  # Output log file
+        self._log_file_tail_offset = None  # Byte offset of the template tail in the log file
         self.log_file_template = None  # Store the log file template
 
         # Load the HTML template when the logger is initialized
@@ -57,30 +76,87 @@ class Logger:
             # Fallback: Print the message without color
             print(message)
 
+    # Setting a new log file starts it over from the template
+    @property
+    def log_file(self):
+        return self._log_file
+
+    @log_file.setter
+    def log_file(self, filepath):
+        self._log_file = filepath
+        self._log_file_tail_offset = None
+
+    # Split the template around the content placeholder
+    def template_parts(self):
+        template = self.log_file_template or "{{content}}"
+        head, _, tail = template.partition("{{content}}")
+        return head, tail
+
+    # Format a log entry as an HTML line in color
+    def format_entry(self, entry):
+        color_info = self.css_color_map.get(entry["color"], (entry["color"], "#f5f5f5"))
+        return f"<p style='color:{color_info[0]};background:{color_info[1]}'>{entry['text']}</p>\n"
+
     # Write the log file in color
     def write_log_file(self, logs, filepath):
         """Write the complete log file using the stored log entries"""
-        content = ""
-        for entry in logs:
-            color_info = self.css_color_map.get(
-                entry["color"], (entry["color"], "#f5f5f5")
-            )
-            content += f"<p style='color:{color_info[0]};background:{color_info[1]}'>{entry['text']}</p>\n"
+        head, tail = self.template_parts()
+        content = "".join(self.format_entry(entry) for entry in logs)
+        data = (head + content).encode("utf-8")
+
+        with open(filepath, "wb") as f:
+            f.write(data + tail.encode("utf-8"))
+        return len(data)
 
-        with open(filepath, "w") as f:
-            f.write(self.log_file_template.replace("{{content}}", content))
+    # Append an entry to the log file by overwriting the template tail, instead of rewriting the file
+    def append_log_file(self, entry, filepath):
+        if self._log_file_tail_offset is None or not os.path.exists(filepath):
+            self._log_file_tail_offset = self.write_log_file(self.logs, filepath)
+            return
 
-    # Write a line to the log file and terminal
-    def log(self, text, color="black", print=True):
-        # Write to the terminal
+        _, tail = self.template_parts()
+        data = self.format_entry(entry).encode("utf-8")
+        with open(filepath, "r+b") as f:
+            f.seek(self._log_file_tail_offset)
+            f.write(data + tail.encode("utf-8"))
+            f.truncate()
+        self._log_file_tail_offset += len(data)
+
+    # Keep an entry in memory, spilling the oldest one to disk once the buffer is full
+    def remember(self, entry):
+        if len(self.logs) == self.logs.maxlen and self.spill_file:
+            with open(self.spill_file, "a") as f:
+                f.write(json.dumps(self.logs[0]) + "\n")
+        self.logs.append(entry)
+
+    # Write log events to the log file, called on the event writer thread
+    def consume(self, record):
+        if "text" not in record or "color" not in record or record.get("logger") != self.id:
+            return
+        entry = {"text": record["text"], "color": record["color"]}
+        self.remember(entry)
+        if self.log_file:
+            self.append_log_file(entry, self.log_file)
+
+    # Write a line to the log file and terminal, with an optional event name and fields for the event log
+    def log(self, text, color="black", print=True, event="log", **fields):
         if print:
             self.print_colored(text, color)
-        # Write to the log file
-        self.logs.append({"text": text, "color": color})
-        if self.log_file:
-            self.write_log_file(self.logs, self.log_file)
+        self.events.emit(event, text=text, color=color, print=print, logger=self.id, **fields)
         return text
 
+    # Record a structured event without showing it
+    def event(self, event, **fields):
+        return self.events.emit(event, **fields)
+
+    # Wait until all queued log lines have been written
+    def flush(self):
+        self.events.flush()
+
+    # Write the remaining log lines and stop consuming the event stream
+    def close(self):
+        self.events.unsubscribe(self.consume)
+
 
 # Create a global logger
 logger = Logger()
\ No newline at end of file
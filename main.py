@@ -2,13 +2,15 @@ import os
 import openai
 from dotenv import load_dotenv
 import logging
+from os_computer_use.transport import get_http_client
 
 # Load environment variables from .env file
 load_dotenv()
 
 client = openai.OpenAI(
     base_url="https://api.groq.com/openai/v1",
-    api_key=os.environ.get("GROQ_API_KEY")
+    api_key=os.environ.get("GROQ_API_KEY"),
+    http_client=get_http_client("https://api.groq.com/openai/v1")
 )
 
 response = client.chat.completions.create(
@@ -3,12 +3,16 @@ import base64
 import requests
 from openai import OpenAI
 from dotenv import load_dotenv
+from os_computer_use.transport import get_http_client
 
 # Load environment variables from .env file
 load_dotenv()
 
 # Initialize the OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = OpenAI(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    http_client=get_http_client("https://api.openai.com/v1")
+)
 
 def encode_image_to_base64(image_path):
     """
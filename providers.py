@@ -1,11 +1,24 @@
-from openai import OpenAI
-from anthropic import Anthropic
+from openai import OpenAI, AsyncOpenAI
+from anthropic import Anthropic, AsyncAnthropic
 
-from PIL import Image
-import io
+from collections import OrderedDict
+import asyncio
+import hashlib
 import json
 import re
 import base64
+import contextvars
+import copy
+import threading
+import time
+import weakref
+
+from os_computer_use.image import prepare_image
+from os_computer_use.events import events
+from os_computer_use.logging import logger
+from os_computer_use.tracing import span
+from os_computer_use.transport import get_http_client, get_async_http_client
+from os_computer_use.streaming import ToolCallStreamParser
 
 
 def Message(content, role="assistant"):
@@ -24,6 +37,132 @@ def parse_json(s):
         return None
 
 
+# Detect the image type from the leading magic bytes, without decoding the image
+def detect_image_type(data, default="png"):
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if data.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    if data.startswith(b"BM"):
+        return "bmp"
+    return default
+
+
+class ImageBlockCache:
+    """
+    A content-addressed LRU cache of provider-specific image blocks, keyed by a hash of the raw image bytes
+    """
+
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(data, options=None):
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        return digest, repr(sorted(options.items())) if options else None
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    # Grow the cache to hold at least the given number of entries, e.g. every image of a history
+    def reserve(self, size):
+        with self.lock:
+            self.max_size = max(self.max_size, size)
+
+    def put(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class FrozenDict(dict):
+    """
+    A read-only dict, so cached tool schemas shared across requests cannot be modified
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Tool schemas are immutable; copy them before modifying")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return json.loads(json.dumps(self))
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class ToolSchemaRegistry:
+    """
+    Caches tool schemas by provider class and function definitions.
+    The schema is built in the order of the definitions and frozen, so every request sends the same tool block.
+    """
+
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # Return the cached schema, calling build(definitions) on a miss
+    def get(self, provider_class, definitions, build):
+        key = (provider_class, id(definitions))
+        with self.lock:
+            entry = self.entries.get(key)
+            # The entry keeps the definitions alive so their id is not reused, and a deep copy of them
+            # catches functions added, removed or edited in place since the schema was built
+            if entry is not None and entry[0] is definitions and entry[1] == definitions:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        snapshot = copy.deepcopy(definitions)
+        schema = freeze(build(definitions))
+        with self.lock:
+            self.entries[key] = (definitions, snapshot, schema)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return schema
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# Create a global tool schema registry shared by all providers
+tool_schemas = ToolSchemaRegistry()
+
+
 class LLMProvider:
     """
     The LLM provider is used to make calls to an LLM given a provider and model name, with optional tool use support
@@ -36,14 +175,63 @@ class LLMProvider:
     # Mapping of model aliases
     aliases = {}
 
+    # Image preparation: max_long_edge, format, quality and screen_size (see prepare_image)
+    image_options = None
+
+    # Tool parameters holding screen coordinates, mapped to the x or y axis
+    coordinate_params = {
+        "x": 0,
+        "y": 1,
+        "start_x": 0,
+        "start_y": 1,
+        "end_x": 0,
+        "end_y": 1,
+    }
+
+    # Minimum number of encoded image blocks kept across turns; the cache grows to fit the history
+    image_cache_size = 64
+
+    # History compaction policy applied before each request (a HistoryCompaction or None)
+    compaction = None
+
+    # Retries of the API client on connection errors, 429 and 5xx responses (the SDK default)
+    max_retries = 2
+
     # Initialize the API client
-    def __init__(self, model):
+    def __init__(self, model, image_options=None, compaction=None):
         self.model = self.aliases.get(model, model)
+        if image_options is not None:
+            self.image_options = image_options
+        if compaction is not None:
+            self.compaction = compaction
+        self.image_cache = ImageBlockCache(self.image_cache_size)
+        self._image_transform = contextvars.ContextVar("image_transform", default=None)
         print(f"Using {self.__class__.__name__} with {self.model}")
         self.client = self.create_client()
-
-    # Convert our function schema to the provider's required format
+        # Async clients by event loop, created on first use by acompletion; call() stays synchronous
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._async_lock = threading.Lock()
+
+    # The async API client of the running event loop, since its connection pool is bound to that loop
+    @property
+    def async_client(self):
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                # Forget the clients of loops that were closed, e.g. by earlier asyncio.run calls
+                for closed in [other for other in self._async_clients if other.is_closed()]:
+                    del self._async_clients[closed]
+                client = self.create_async_client()
+                self._async_clients[loop] = client
+            return client
+
+    # Convert our function schema to the provider's required format, built once per provider class and definitions
     def create_function_schema(self, definitions):
+        with span("provider.schema"):
+            return tool_schemas.get(type(self), definitions, self.build_function_schema)
+
+    def build_function_schema(self, definitions):
         functions = []
 
         for name, details in definitions.items():
@@ -64,14 +252,50 @@ class LLMProvider:
         return {
             "type": "function",
             "name": name,
-            "parameters": parameters,
+            "parameters": self.scale_coordinates(parameters),
         }
 
+    # Scale transform of the latest image in the current request, see prepare_completion
+    @property
+    def image_transform(self):
+        return self._image_transform.get()
+
+    # Map coordinates on the latest (downscaled) image back to screen pixels
+    def scale_coordinates(self, parameters):
+        image_transform = self.image_transform
+        if image_transform is None or not isinstance(parameters, dict):
+            return parameters
+        scaled = dict(parameters)
+        for param_name, axis in self.coordinate_params.items():
+            try:
+                value = float(parameters[param_name])
+            except (KeyError, TypeError, ValueError):
+                continue
+            scaled[param_name] = round(value * image_transform.scale[axis])
+        return scaled
+
+    # Downscale and re-encode an image according to the provider's image options
+    def prepare_image_data(self, image_data):
+        return prepare_image(image_data, **(self.image_options or {}))
+
+    # Wrap an image in an image object, returned with its scale transform
+    def wrap_image(self, image_data):
+        # Images already sent in earlier turns are served from the cache. Each message gets its
+        # own copy of the block, so that modifying one request does not affect the others
+        key = self.image_cache.key(image_data, self.image_options)
+        cached = self.image_cache.get(key)
+        if cached is None:
+            # Pass raw bytes so that the image type can be detected properly.
+            prepared = self.prepare_image_data(image_data)
+            cached = (self.create_image_block(prepared.data), prepared)
+            self.image_cache.put(key, cached)
+        block, prepared = cached
+        return copy.deepcopy(block), prepared
+
     # Wrap a content block in a text or an image object
     def wrap_block(self, block):
         if isinstance(block, bytes):
-            # Pass raw bytes so that imghdr can detect the image type properly.
-            return self.create_image_block(block)
+            return self.wrap_image(block)[0]
         else:
             return Text(block)
 
@@ -84,26 +308,135 @@ class LLMProvider:
         else:
             return message
 
-    # Create a chat completion using the API client
-    def completion(self, messages, **kwargs):
+    # Build the request messages and parameters, returned with the scale transform of the latest image
+    def build_request(self, messages, **kwargs):
         # Skip the tools parameter if it's None
         filtered_kwargs = {k: v for k, v in kwargs.items() if v is not None}
-        # Wrap content blocks in image or text objects if necessary
-        new_messages = [self.transform_message(message) for message in messages]
-        # Call the inference provider
-        completion = self.client.create(
-            messages=new_messages, model=self.model, **filtered_kwargs
+        # Swap old screenshots for thumbnails or stubs to bound the request size
+        if self.compaction:
+            messages = self.compaction.compact(messages)
+        # Every image of the history is wrapped in each request, so the cache must hold them all.
+        # Otherwise the scan in history order evicts each entry just before it is needed again
+        self.image_cache.reserve(
+            sum(
+                isinstance(block, bytes)
+                for message in messages
+                if isinstance(message["content"], list)
+                for block in message["content"]
+            )
         )
-        # Check for errors in the response
+        # Wrap content blocks in image or text objects if necessary
+        new_messages = []
+        image_transform = None
+        for message in messages:
+            content = message["content"]
+            if isinstance(content, list):
+                wrapped_content = []
+                for block in content:
+                    if isinstance(block, bytes):
+                        block, image_transform = self.wrap_image(block)
+                        wrapped_content.append(block)
+                    else:
+                        wrapped_content.append(Text(block))
+                message = {**message, "content": wrapped_content}
+            new_messages.append(message)
+        return dict(messages=new_messages, model=self.model, **filtered_kwargs), image_transform
+
+    # Build the request messages and parameters shared by the sync and async APIs.
+    # The transform used to scale the tool calls of this request is kept in a context variable,
+    # so that threads and tasks sharing a provider each see the one of their own request.
+    def prepare_completion(self, messages, **kwargs):
+        request, image_transform = self.build_request(messages, **kwargs)
+        self._image_transform.set(image_transform)
+        return request
+
+    # Check for errors in the response
+    def check_completion(self, completion):
         if hasattr(completion, "error"):
             raise Exception("Error calling model: {}".format(completion.error))
         return completion
 
+    # A request offering tools starts a new agent step; other requests, e.g. summaries, belong to the current one
+    def start_step(self, tools):
+        if tools:
+            events.next_step()
+
+    # Create a chat completion using the API client
+    def completion(self, messages, **kwargs):
+        self.start_step(kwargs.get("tools"))
+        with span("provider.completion", provider=self.__class__.__name__, model=self.model):
+            start = time.perf_counter()
+            with span("provider.prepare", messages=len(messages)):
+                request = self.prepare_completion(messages, **kwargs)
+            # Call the inference provider
+            with span("provider.network"):
+                completion = self.client.create(**request)
+            # A stream is recorded by its consumer once it has been read
+            if not kwargs.get("stream"):
+                self.record_completion(messages, completion, start)
+            return self.check_completion(completion)
+
+    # Log a structured event for a request, with the new screenshots stored by reference
+    def record_completion(self, messages, completion, start):
+        images = [
+            block
+            for message in messages
+            if isinstance(message.get("content"), list)
+            for block in message["content"]
+            if isinstance(block, bytes)
+        ]
+        last_content = messages[-1].get("content") if messages else None
+        usage = getattr(completion, "usage", None)
+        logger.event(
+            "completion",
+            provider=self.__class__.__name__,
+            model=self.model,
+            latency=time.perf_counter() - start,
+            messages=len(messages),
+            image_bytes=sum(len(image) for image in images),
+            screenshots=[
+                block for block in last_content if isinstance(block, bytes)
+            ]
+            if isinstance(last_content, list)
+            else [],
+            usage=usage.model_dump() if hasattr(usage, "model_dump") else None,
+        )
+
+    # Create a chat completion using the async API client
+    async def acompletion(self, messages, **kwargs):
+        self.start_step(kwargs.get("tools"))
+        start = time.perf_counter()
+        # Image re-encoding and history compaction run on a worker thread, off the event loop
+        with span("provider.prepare", messages=len(messages)):
+            request, image_transform = await asyncio.to_thread(self.build_request, messages, **kwargs)
+        self._image_transform.set(image_transform)
+        completion = await self.async_client.create(**request)
+        self.record_completion(messages, completion, start)
+        return self.check_completion(completion)
+
 
 class OpenAIBaseProvider(LLMProvider):
 
+    image_options = {"max_long_edge": 2048, "format": "JPEG", "quality": 85}
+
+    # Used to pick the pooled transport when no base URL is set
+    default_base_url = "https://api.openai.com/v1"
+
     def create_client(self):
-        return OpenAI(base_url=self.base_url, api_key=self.api_key).chat.completions
+        return OpenAI(
+            base_url=self.base_url,
+            api_key=self.api_key,
+            max_retries=self.max_retries,
+            http_client=get_http_client(self.base_url or self.default_base_url),
+        ).chat.completions
+
+    def create_async_client(self):
+        return AsyncOpenAI(
+            base_url=self.base_url,
+            api_key=self.api_key,
+            max_retries=self.max_retries,
+            http_client=get_async_http_client(self.base_url or self.default_base_url),
+        ).chat.completions
 
     def create_function_def(self, name, details, properties, required):
         return {
@@ -120,13 +453,7 @@ class OpenAIBaseProvider(LLMProvider):
         }
 
     def create_image_block(self, image_data: bytes):
-        # Use Pillow to detect the image type
-        image_type = "png"  # Default to PNG if detection fails
-        try:
-            with Image.open(io.BytesIO(image_data)) as img:
-                image_type = img.format.lower()
-        except Exception as e:
-            print(f"Error detecting image type: {e}")
+        image_type = detect_image_type(image_data)
 
         # Base64-encode the raw image bytes.
         encoded = base64.b64encode(image_data).decode("utf-8")
@@ -135,10 +462,8 @@ class OpenAIBaseProvider(LLMProvider):
             "image_url": {"url": f"data:image/{image_type};base64,{encoded}"},
         }
 
-    def call(self, messages, functions=None):
-        # If functions are provided, only return actions
-        tools = self.create_function_schema(functions) if functions else None
-        completion = self.completion(messages, tools=tools)
+    # Split a completion into response text and tool calls
+    def parse_completion(self, completion, functions=None):
         message = completion.choices[0].message
 
         # Return response text and tool calls separately
@@ -171,11 +496,89 @@ class OpenAIBaseProvider(LLMProvider):
         else:
             return message.content
 
+    def call(self, messages, functions=None):
+        # If functions are provided, only return actions
+        tools = self.create_function_schema(functions) if functions else None
+        completion = self.completion(messages, tools=tools)
+        return self.parse_completion(completion, functions)
+
+    async def acall(self, messages, functions=None):
+        tools = self.create_function_schema(functions) if functions else None
+        completion = await self.acompletion(messages, tools=tools)
+        return self.parse_completion(completion, functions)
+
+    # Stream the completion and pass each tool call to on_tool_call as soon as its arguments are complete.
+    # Returns the same values as call(), followed by the timings of this stream: time_to_first_action
+    # and total_time in seconds
+    def stream_call(self, messages, functions=None, on_tool_call=None):
+        start = time.perf_counter()
+        first_action = None
+        tools = self.create_function_schema(functions) if functions else None
+        stream = self.completion(messages, tools=tools, stream=True)
+        parser = ToolCallStreamParser(self.create_tool_call)
+
+        last_chunk = None
+        for chunk in stream:
+            last_chunk = chunk
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            completed = []
+            for tool_call_delta in delta.tool_calls or []:
+                completed += parser.add_tool_call_delta(tool_call_delta)
+            if delta.content:
+                completed += parser.add_content(delta.content)
+            if functions and completed:
+                if first_action is None:
+                    first_action = time.perf_counter() - start
+                for tool_call in completed:
+                    if on_tool_call:
+                        on_tool_call(tool_call)
+
+        for tool_call in parser.finish() if functions else []:
+            if first_action is None:
+                first_action = time.perf_counter() - start
+            if on_tool_call:
+                on_tool_call(tool_call)
+
+        stats = {
+            "time_to_first_action": first_action,
+            "total_time": time.perf_counter() - start,
+        }
+        # The final chunk carries the usage, if the provider reports it
+        self.record_completion(messages, last_chunk, start)
+
+        # Return response text and tool calls separately, like call()
+        if functions:
+            if parser.inline_calls:
+                return None, parser.tool_calls, stats
+            return parser.text or None, parser.tool_calls, stats
+        else:
+            return parser.text, stats
+
 
 class AnthropicBaseProvider(LLMProvider):
 
+    image_options = {"max_long_edge": 1568, "format": "JPEG", "quality": 85}
+
+    # Used to pick the pooled transport when no base URL is set
+    default_base_url = "https://api.anthropic.com"
+
     def create_client(self):
-        return Anthropic(api_key=self.api_key).messages
+        return Anthropic(
+            base_url=self.base_url,
+            api_key=self.api_key,
+            max_retries=self.max_retries,
+            http_client=get_http_client(self.base_url or self.default_base_url),
+        ).messages
+
+    def create_async_client(self):
+        return AsyncAnthropic(
+            base_url=self.base_url,
+            api_key=self.api_key,
+            max_retries=self.max_retries,
+            http_client=get_async_http_client(self.base_url or self.default_base_url),
+        ).messages
 
     def create_function_def(self, name, details, properties, required):
         return {
@@ -188,29 +591,27 @@ class AnthropicBaseProvider(LLMProvider):
             },
         }
 
-    def create_image_block(self, base64_image):
+    def create_image_block(self, image_data: bytes):
+        image_type = detect_image_type(image_data)
         return {
             "type": "image",
             "source": {
                 "type": "base64",
-                "media_type": "image/png",
-                "data": base64_image,
+                "media_type": f"image/{image_type}",
+                "data": base64.b64encode(image_data).decode("utf-8"),
             },
         }
 
-    def call(self, messages, functions=None):
-        tools = self.create_function_schema(functions) if functions else None
-
-        # Move all messages with the system role to a system parameter
+    # Move all messages with the system role to a system parameter
+    def split_system(self, messages):
         system = "\n".join(
             msg.get("content") for msg in messages if msg.get("role") == "system"
         )
         messages = [msg for msg in messages if msg.get("role") != "system"]
+        return system, messages
 
-        # Call the Anthropic API
-        completion = self.completion(
-            messages, system=system, tools=tools, max_tokens=4096
-        )
+    # Split a completion into response text and tool calls
+    def parse_completion(self, completion, functions=None):
         text = "".join(getattr(block, "text", "") for block in completion.content)
 
         # Return response text and tool calls separately
@@ -226,15 +627,34 @@ class AnthropicBaseProvider(LLMProvider):
         else:
             return text
 
+    def call(self, messages, functions=None):
+        tools = self.create_function_schema(functions) if functions else None
+        system, messages = self.split_system(messages)
+
+        # Call the Anthropic API
+        completion = self.completion(
+            messages, system=system, tools=tools, max_tokens=4096
+        )
+        return self.parse_completion(completion, functions)
+
+    async def acall(self, messages, functions=None):
+        tools = self.create_function_schema(functions) if functions else None
+        system, messages = self.split_system(messages)
+        completion = await self.acompletion(
+            messages, system=system, tools=tools, max_tokens=4096
+        )
+        return self.parse_completion(completion, functions)
+
 
 class MistralBaseProvider(OpenAIBaseProvider):
     def create_function_def(self, name, details, properties, required):
         # If description is wrapped in a dict, extract the inner string
         if isinstance(details.get("description"), dict):
-            details["description"] = details["description"].get("description", "")
+            details = {**details, "description": details["description"].get("description", "")}
         return super().create_function_def(name, details, properties, required)
 
-    def call(self, messages, functions=None):
+    # Fold a trailing assistant message into the last user message
+    def merge_assistant_prefix(self, messages):
         if messages and messages[-1].get("role") == "assistant":
             prefix = messages.pop()["content"]
             if messages and messages[-1].get("role") == "user":
@@ -243,4 +663,10 @@ class MistralBaseProvider(OpenAIBaseProvider):
                 )
             else:
                 messages.append({"role": "user", "content": prefix})
-        return super().call(messages, functions)
\ No newline at end of file
+        return messages
+
+    def call(self, messages, functions=None):
+        return super().call(self.merge_assistant_prefix(messages), functions)
+
+    async def acall(self, messages, functions=None):
+        return await super().acall(self.merge_assistant_prefix(messages), functions)
@@ -0,0 +1,176 @@
+from collections import OrderedDict
+import threading
+
+import numpy as np
+
+from os_computer_use.grounding_cache import normalize_prompt
+
+
+# Normalized cross-correlation of a template against every position of a frame, both 2D float arrays
+def match_template(frame, template):
+    frame_height, frame_width = frame.shape
+    height, width = template.shape
+    if height > frame_height or width > frame_width:
+        return np.zeros((0, 0))
+
+    count = height * width
+    zero_mean = template - template.mean()
+    template_norm = np.sqrt((zero_mean**2).sum())
+    if template_norm == 0:
+        return np.zeros((frame_height - height + 1, frame_width - width + 1))
+
+    # Correlation with the zero-mean template, computed in the frequency domain
+    shape = (frame_height + height - 1, frame_width + width - 1)
+    spectrum = np.fft.rfft2(frame, shape) * np.fft.rfft2(zero_mean[::-1, ::-1], shape)
+    correlation = np.fft.irfft2(spectrum, shape)[height - 1 : frame_height, width - 1 : frame_width]
+
+    # Window sums of the frame and its square from integral images
+    def window_sums(values):
+        integral = np.pad(values.cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+        return (
+            integral[height:, width:]
+            - integral[:-height, width:]
+            - integral[height:, :-width]
+            + integral[:-height, :-width]
+        )
+
+    sums = window_sums(frame)
+    variance = window_sums(frame**2) - sums**2 / count
+    denominator = np.sqrt(np.maximum(variance, 0)) * template_norm
+    return np.where(denominator > 1e-6, correlation / np.maximum(denominator, 1e-6), 0.0)
+
+
+def to_array(image, downscale=1):
+    image = image.convert("L")
+    if downscale > 1:
+        image = image.reduce(downscale)
+    return np.asarray(image, dtype=np.float64)
+
+
+class TemplateRelocator:
+    """
+    Finds previously grounded elements again by matching the pixels around them, without a remote call
+    """
+
+    def __init__(
+        self,
+        radius=32,
+        downscale=4,
+        threshold=0.9,
+        max_templates=128,
+        ambiguity_margin=0.05,
+        coarse_margin=0.25,
+        min_std=6.0,
+        max_peaks=8,
+    ):
+        self.radius = radius  # Half size in pixels of the crop kept around each element
+        self.downscale = downscale  # Reduction factor for the coarse search
+        self.threshold = threshold  # Smallest correlation accepted as a match
+        self.max_templates = max_templates
+        self.ambiguity_margin = ambiguity_margin  # Other peaks scoring within this of the best make a match ambiguous
+        self.coarse_margin = coarse_margin  # Coarse peaks scoring within this of the best are refined
+        self.min_std = min_std  # Crops flatter than this (gray level standard deviation) are not kept
+        self.max_peaks = max_peaks  # Number of candidate peaks examined per search
+        self.templates = OrderedDict()  # Crop, center offset and grounded position by normalized prompt
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "ambiguous": 0}
+
+    # Keep the crop around a grounded position
+    def remember(self, prompt, image, position):
+        if position is None:
+            return
+        x, y = int(position[0]), int(position[1])
+        # Align the crop to the coarse grid, so an unmoved element matches exactly when downscaled
+        left = max((x - self.radius) // self.downscale * self.downscale, 0)
+        top = max((y - self.radius) // self.downscale * self.downscale, 0)
+        right, bottom = min(x + self.radius, image.width), min(y + self.radius, image.height)
+        if right - left < self.downscale * 4 or bottom - top < self.downscale * 4:
+            return
+        crop = image.crop((left, top, right, bottom))
+        # A flat crop matches everywhere; drop any older template rather than keep a stale one
+        if to_array(crop).std() < self.min_std:
+            self.forget(prompt)
+            return
+        with self.lock:
+            key = normalize_prompt(prompt)
+            self.templates[key] = (crop, (x - left, y - top), (x, y))
+            self.templates.move_to_end(key)
+            while len(self.templates) > self.max_templates:
+                self.templates.popitem(last=False)
+
+    # Peaks of a score map within margin of the best, as (row, col), best first
+    def candidate_peaks(self, scores, height, width, margin):
+        scores = scores.copy()
+        peaks = []
+        best = None
+        while len(peaks) < self.max_peaks:
+            row, col = np.unravel_index(np.argmax(scores), scores.shape)
+            score = float(scores[row, col])
+            if not np.isfinite(score) or (best is not None and score < best - margin):
+                break
+            best = score if best is None else best
+            peaks.append((row, col))
+            # Suppress the neighbourhood of the peak, one template size in each direction
+            scores[max(row - height + 1, 0) : row + height, max(col - width + 1, 0) : col + width] = -np.inf
+        return peaks
+
+    # Match the crop at full resolution around a coarse peak, returning (score, position)
+    def refine(self, image, crop, center, row, col):
+        margin = self.downscale * 2
+        left = max(col * self.downscale - margin, 0)
+        top = max(row * self.downscale - margin, 0)
+        right = min(col * self.downscale + crop.width + margin, image.width)
+        bottom = min(row * self.downscale + crop.height + margin, image.height)
+        fine = match_template(to_array(image.crop((left, top, right, bottom))), to_array(crop))
+        if fine.size == 0:
+            return 0.0, None
+        fine_row, fine_col = np.unravel_index(np.argmax(fine), fine.shape)
+        return float(fine[fine_row, fine_col]), (int(left + fine_col + center[0]), int(top + fine_row + center[1]))
+
+    # Find an element on a new frame, returning (position, score) or (None, score) when absent or ambiguous
+    def locate(self, prompt, image):
+        with self.lock:
+            entry = self.templates.get(normalize_prompt(prompt))
+        if entry is None:
+            self.stats["misses"] += 1
+            return None, 0.0
+        crop, center, grounded = entry
+
+        # Coarse search over the whole downscaled frame; keep every plausible peak
+        template = to_array(crop, self.downscale)
+        scores = match_template(to_array(image, self.downscale), template)
+        if scores.size == 0:
+            self.stats["misses"] += 1
+            return None, 0.0
+        peaks = self.candidate_peaks(scores, *template.shape, self.coarse_margin)
+
+        # Refine every candidate at full resolution
+        matches = sorted(
+            (match for match in (self.refine(image, crop, center, row, col) for row, col in peaks) if match[1]),
+            reverse=True,
+        )
+        if not matches or matches[0][0] < self.threshold:
+            self.stats["misses"] += 1
+            return None, matches[0][0] if matches else 0.0
+
+        # Several near-equal matches (repeated widgets): only accept the one still at the grounded position
+        contenders = [match for match in matches if match[0] >= matches[0][0] - self.ambiguity_margin]
+        if len(contenders) > 1:
+            nearby = [
+                match
+                for match in contenders
+                if abs(match[1][0] - grounded[0]) <= self.downscale and abs(match[1][1] - grounded[1]) <= self.downscale
+            ]
+            if len(nearby) != 1:
+                self.stats["ambiguous"] += 1
+                self.stats["misses"] += 1
+                return None, matches[0][0]
+            contenders = nearby
+
+        score, position = contenders[0]
+        self.stats["hits"] += 1
+        return position, score
+
+    def forget(self, prompt):
+        with self.lock:
+            self.templates.pop(normalize_prompt(prompt), None)
@@ -3,23 +3,34 @@
 Screenshot Tool - Take screenshots of the screen and save to images folder
 
 This module provides functions to capture screenshots of the screen and save them
-to an 'images' folder. It maintains only the most recent screenshot by deleting
-previous ones.
+to an 'images' folder. Recent frames are kept in an in-memory ring buffer; only
+the frames still in the buffer keep a file on disk. capture_frame() keeps the
+PNG encode off the caller's thread, while the file based helpers wait for it.
 
 Requirements:
-- pyautogui: pip install pyautogui
+- pyautogui: pip install pyautogui (default input backend, see backends.py)
 - pillow: pip install pillow (usually installed with pyautogui)
 """
 
 import os
 import glob
 import time
-import pyautogui
-from datetime import datetime
+from os_computer_use.backends import get_backend
+from os_computer_use.frame_buffer import FrameBuffer
+from os_computer_use.settle import wait_until_stable
 
 # Define the directory to save screenshots
 IMAGES_DIR = "images"
 
+# Number of recent frames kept in memory (and on disk, if spilled)
+FRAME_BUFFER_SIZE = 8
+
+# Ring buffer holding the most recent frames
+frame_buffer = FrameBuffer(maxlen=FRAME_BUFFER_SIZE, directory=IMAGES_DIR)
+
+# Screenshots left over from earlier runs are deleted once, on the first capture
+_previous_screenshots_deleted = False
+
 def ensure_images_dir():
     """
     Ensure the images directory exists.
@@ -40,42 +51,59 @@ def delete_previous_screenshots():
         except Exception as e:
             print(f"Error deleting {file}: {e}")
 
-def take_screenshot(region=None):
+def capture_frame(region=None, spill=False, image=None):
+    """
+    Take a screenshot and keep it in the in-memory frame buffer.
+    
+    Args:
+        region (tuple, optional): Region to capture (left, top, width, height).
+                                 If None, captures the entire screen.
+        spill (bool): Whether to also write the frame to disk in the background
+        image (PIL.Image, optional): Screenshot of the region captured already,
+                                     used instead of taking a new one
+    
+    Returns:
+        Frame: The captured frame, or None if the capture failed
+    """
+    try:
+        screenshot = image if image is not None else get_backend().screenshot(region)
+        return frame_buffer.push(screenshot, spill=spill)
+    except Exception as e:
+        print(f"Error taking screenshot: {e}")
+        return None
+
+def take_screenshot(region=None, image=None):
     """
     Take a screenshot of the screen or a specific region and save it to the images directory.
     
+    This is a compatibility wrapper around capture_frame() for callers that need
+    a file path. The file is written by the background writer, but this function
+    waits until it exists, so the PNG encode is still paid by the caller. Use
+    capture_frame() where the frame is only needed in memory.
+    
     Args:
         region (tuple, optional): Region to capture (left, top, width, height).
                                  If None, captures the entire screen.
+        image (PIL.Image, optional): Screenshot of the region captured already,
+                                     saved instead of taking a new one
     
     Returns:
         str: Path to the saved screenshot
     """
-    # Ensure images directory exists
-    ensure_images_dir()
+    global _previous_screenshots_deleted
     
-    # Delete previous screenshots
-    delete_previous_screenshots()
+    # Ensure images directory exists and clear out files from earlier runs
+    if not _previous_screenshots_deleted:
+        ensure_images_dir()
+        delete_previous_screenshots()
+        _previous_screenshots_deleted = True
     
-    # Generate a filename with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"screenshot_{timestamp}.png"
-    filepath = os.path.join(IMAGES_DIR, filename)
-    
-    # Take the screenshot
-    try:
-        if region:
-            screenshot = pyautogui.screenshot(region=region)
-        else:
-            screenshot = pyautogui.screenshot()
-        
-        # Save the screenshot
-        screenshot.save(filepath)
-        print(f"Screenshot saved: {filepath}")
-        return filepath
-    except Exception as e:
-        print(f"Error taking screenshot: {e}")
+    frame = capture_frame(region, spill=True, image=image)
+    if frame is None:
         return None
+    
+    frame.wait_saved()
+    return frame.path
 
 def take_screenshot_with_delay(delay_seconds=3, region=None):
     """
@@ -92,13 +120,34 @@ def take_screenshot_with_delay(delay_seconds=3, region=None):
     time.sleep(delay_seconds)
     return take_screenshot(region)
 
+def take_screenshot_when_stable(timeout=3, region=None):
+    """
+    Take a screenshot as soon as the screen stops changing.
+    
+    The last capture of the wait is saved, rather than taking another one.
+    
+    Args:
+        timeout (float): Longest wait in seconds before capturing anyway
+        region (tuple, optional): Region to capture (left, top, width, height)
+    
+    Returns:
+        str: Path to the saved screenshot
+    """
+    result = wait_until_stable(region=region, timeout=timeout)
+    return take_screenshot(region, image=result.image)
+
 def get_latest_screenshot():
     """
-    Get the path to the most recent screenshot.
+    Get the path to the most recent screenshot, once its file has been written.
     
     Returns:
         str: Path to the most recent screenshot or None if no screenshots exist
     """
+    # Frames captured by this process are found without touching the filesystem
+    latest_path = frame_buffer.latest_path()
+    if latest_path:
+        return latest_path
+    
     screenshot_files = glob.glob(os.path.join(IMAGES_DIR, "*.png"))
     if not screenshot_files:
         return None
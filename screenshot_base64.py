@@ -6,19 +6,27 @@ This module provides functions to capture screenshots of the screen
 and convert them to base64 encoded strings for use with APIs.
 
 Requirements:
-- pyautogui: pip install pyautogui
+- pyautogui: pip install pyautogui (default input backend, see backends.py)
 - pillow: pip install pillow (usually installed with pyautogui)
 """
 
 import os
 import base64
 import time
-import pyautogui
+from os_computer_use.backends import get_backend
 from datetime import datetime
 from PIL import Image
 import io
+from os_computer_use.frame_buffer import background_writer
+from os_computer_use.frame_dedup import NewFrame, SameFrame, frame_dedup
+from os_computer_use.settle import wait_until_stable
+from os_computer_use.tracing import span, traced
 
-def screenshot_to_base64(region=None, include_mime=False, save_to_file=False, file_dir="images"):
+# Default directory for saved screenshots
+IMAGES_DIR = "images"
+
+@traced("screenshot_to_base64")
+def screenshot_to_base64(region=None, include_mime=False, save_to_file=False, file_dir=None, dedup=False, image=None):
     """
     Take a screenshot and convert it directly to a base64 encoded string.
     
@@ -26,52 +34,70 @@ def screenshot_to_base64(region=None, include_mime=False, save_to_file=False, fi
         region (tuple, optional): Region to capture (left, top, width, height).
                                  If None, captures the entire screen.
         include_mime (bool): Whether to include the MIME type prefix in the output.
-        save_to_file (bool): Whether to also save the screenshot to a file.
-        file_dir (str): Directory to save the screenshot if save_to_file is True.
+        save_to_file (bool): Whether to also save the screenshot to a file. The file is
+                             written in the background from the already encoded bytes.
+        file_dir (str, optional): Directory to save the screenshot if save_to_file is True,
+                                  IMAGES_DIR by default.
+        dedup (bool): Whether to skip encoding when the screen is unchanged since
+                      the last distinct frame.
+        image (PIL.Image, optional): Screenshot of the region captured already,
+                                     encoded instead of taking a new one.
     
     Returns:
-        str: Base64 encoded string of the screenshot (with MIME prefix if include_mime=True)
+        str: Base64 encoded string of the screenshot (with MIME prefix if include_mime=True),
+             or a SameFrame marker naming the earlier frame if dedup=True and
+             nothing changed. With dedup=True, new captures are NewFrame strings
+             whose frame attribute is the number SameFrame markers refer to.
     """
     try:
         # Take the screenshot
-        if region:
-            screenshot = pyautogui.screenshot(region=region)
+        if image is not None:
+            screenshot = image
         else:
-            screenshot = pyautogui.screenshot()
+            with span("screenshot.capture"):
+                screenshot = get_backend().screenshot(region)
+        
+        # Skip the encode entirely if the screen has not changed
+        frame = None
+        if dedup:
+            with span("screenshot.dedup"):
+                frame, duplicate_of = frame_dedup.check(screenshot, region)
+            if duplicate_of is not None:
+                return SameFrame(duplicate_of)
         
-        # Save to file if requested
-        filepath = None
+        # Encode the frame once; the same bytes are used for the file and the base64 payload
+        with span("screenshot.png_encode") as encode_span:
+            buffer = io.BytesIO()
+            screenshot.save(buffer, format="PNG")
+            img_bytes = buffer.getvalue()
+            encode_span.set(bytes=len(img_bytes))
+        
+        # Save to file if requested, on the background writer thread
         if save_to_file:
-            # Ensure directory exists
-            if not os.path.exists(file_dir):
-                os.makedirs(file_dir)
-                
             # Generate a filename with timestamp
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"screenshot_{timestamp}.png"
-            filepath = os.path.join(file_dir, filename)
-            
-            # Save the screenshot
-            screenshot.save(filepath)
-            print(f"Screenshot saved: {filepath}")
+            filepath = os.path.join(file_dir or IMAGES_DIR, filename)
+            background_writer.write(filepath, img_bytes)
         
         # Convert to base64
-        buffer = io.BytesIO()
-        screenshot.save(buffer, format="PNG")
-        img_bytes = buffer.getvalue()
-        base64_encoded = base64.b64encode(img_bytes).decode('utf-8')
+        with span("screenshot.base64"):
+            base64_encoded = base64.b64encode(img_bytes).decode('utf-8')
         
         # Add MIME prefix if requested
         if include_mime:
             base64_encoded = f"data:image/png;base64,{base64_encoded}"
         
+        # Tell the caller which frame later SameFrame markers refer to
+        if frame is not None:
+            return NewFrame(base64_encoded, frame)
         return base64_encoded
         
     except Exception as e:
         print(f"Error taking screenshot: {e}")
         return None
 
-def screenshot_to_base64_with_delay(delay_seconds=3, region=None, include_mime=False, save_to_file=False):
+def screenshot_to_base64_with_delay(delay_seconds=3, region=None, include_mime=False, save_to_file=False, dedup=False):
     """
     Take a screenshot after a specified delay and convert to base64.
     
@@ -80,19 +106,40 @@ def screenshot_to_base64_with_delay(delay_seconds=3, region=None, include_mime=F
         region (tuple, optional): Region to capture (left, top, width, height)
         include_mime (bool): Whether to include the MIME type prefix
         save_to_file (bool): Whether to also save the screenshot to a file
+        dedup (bool): Whether to return a SameFrame marker for unchanged screens
     
     Returns:
         str: Base64 encoded string of the screenshot
     """
     print(f"Taking screenshot in {delay_seconds} seconds...")
     time.sleep(delay_seconds)
-    return screenshot_to_base64(region, include_mime, save_to_file)
+    return screenshot_to_base64(region, include_mime, save_to_file, dedup=dedup)
+
+def screenshot_to_base64_when_stable(timeout=3, region=None, include_mime=False, save_to_file=False, dedup=False):
+    """
+    Take a screenshot as soon as the screen stops changing and convert to base64.
+    
+    The last capture of the wait is encoded, rather than taking another one.
+    
+    Args:
+        timeout (float): Longest wait in seconds before capturing anyway
+        region (tuple, optional): Region to capture (left, top, width, height)
+        include_mime (bool): Whether to include the MIME type prefix
+        save_to_file (bool): Whether to also save the screenshot to a file
+        dedup (bool): Whether to return a SameFrame marker for unchanged screens
+    
+    Returns:
+        str: Base64 encoded string of the screenshot
+    """
+    result = wait_until_stable(region=region, timeout=timeout)
+    return screenshot_to_base64(region, include_mime, save_to_file, dedup=dedup, image=result.image)
 
 # Example usage
 if __name__ == "__main__":
     # Take a screenshot and convert to base64
     print("Taking a screenshot and converting to base64...")
     base64_str = screenshot_to_base64(save_to_file=True)
+    background_writer.flush()
     
     if base64_str:
         print(f"Base64 encoded string (first 100 chars): {base64_str[:100]}...")
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Session Manager - Run N agent sessions concurrently on isolated displays
+
+Each session runs its tasks in a worker process, bound to its own input
+backend: a VirtualBackend framebuffer or a private Xvfb display. Sessions get
+their own directory for the HTML log, the event stream and screenshots.
+Providers are created once per worker process and shared by the sessions it
+runs. The manager reports aggregate tasks per hour and per-session latency.
+
+Usage, from the directory containing the os_computer_use package:
+    python -m os_computer_use.sessions --sessions 4 --tasks 40 --backend virtual
+    python -m os_computer_use.sessions --sessions 8 --tasks 200 --backend xvfb --output report.json
+
+Requirements:
+- pillow: pip install pillow
+- Xvfb and xdotool for the xvfb backend, see backends.py
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from os_computer_use import backends, screenshot, screenshot_base64
+from os_computer_use.frame_dedup import frame_dedup
+
+# First X display number used by Xvfb sessions; session i gets BASE_DISPLAY + i
+BASE_DISPLAY = 100
+
+# Providers of the current worker process, created once by _init_worker
+_providers = None
+
+
+class Session:
+    """
+    What a task sees of the session running it.
+    """
+
+    def __init__(self, session_id, directory, backend, providers):
+        self.id = session_id
+        self.directory = directory  # Log, events and screenshots of this session
+        self.backend = backend  # Input backend bound to this session's display
+        self.providers = providers  # Providers shared by the sessions of this process
+
+    def __repr__(self):
+        return f"Session({self.id})"
+
+
+def default_providers():
+    """
+    Create the providers configured in config.py.
+
+    Returns:
+        dict: vision_model, action_model and grounding_model
+    """
+    from os_computer_use import config
+
+    return {
+        "vision_model": config.vision_model,
+        "action_model": config.action_model,
+        "grounding_model": config.grounding_model,
+    }
+
+
+def _init_worker(provider_factory):
+    global _providers
+    _providers = provider_factory() if provider_factory else {}
+
+
+def isolate_session(directory):
+    """
+    Point the logger, the event stream and the screenshot buffer of this process at a session directory.
+
+    Args:
+        directory (str): Session directory, created if needed
+    """
+    from os_computer_use.events import events
+    from os_computer_use.logging import logger
+
+    os.makedirs(directory, exist_ok=True)
+    logger.flush()
+    logger.log_file = os.path.join(directory, "log.html")
+    events.path = os.path.join(directory, "events.jsonl")
+    events.screenshot_dir = os.path.join(directory, "screenshots")
+
+    screenshot.frame_buffer.clear()
+    screenshot.frame_buffer.directory = os.path.join(directory, "images")
+    screenshot.IMAGES_DIR = screenshot.frame_buffer.directory
+    screenshot_base64.IMAGES_DIR = screenshot.frame_buffer.directory
+    screenshot._previous_screenshots_deleted = False
+    frame_dedup.reset()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def run_session(session_id, tasks, task_fn, backend_name, backend_options, output_dir):
+    """
+    Run a session's tasks in order, in the current (worker) process.
+
+    Args:
+        session_id (int): Session number
+        tasks (list): Inputs passed to task_fn one at a time
+        task_fn (callable): Module-level function task_fn(session, task) returning a result
+        backend_name (str): 'virtual' or 'xvfb'
+        backend_options (dict): Arguments of the backend class
+        output_dir (str): Parent of the session directories
+
+    Returns:
+        dict: Session id, directory, and per-task latency, result and error
+    """
+    directory = os.path.join(output_dir, f"session-{session_id:03d}")
+    options = dict(backend_options or {})
+    if backend_name == "xvfb":
+        options.setdefault("display", f":{BASE_DISPLAY + session_id}")
+    backend = backends.create_backend(backend_name, **options)
+    previous = backends.set_backend(backend)
+    isolate_session(directory)
+    session = Session(session_id, directory, backend, _providers if _providers is not None else {})
+
+    records = []
+    try:
+        for task in tasks:
+            start = time.perf_counter()
+            record = {"task": task, "result": None, "error": None}
+            try:
+                record["result"] = task_fn(session, task)
+            except Exception as e:
+                record["error"] = f"{type(e).__name__}: {e}"
+                traceback.print_exc()
+            record["latency"] = time.perf_counter() - start
+            records.append(record)
+    finally:
+        from os_computer_use.events import events
+        from os_computer_use.logging import logger
+
+        logger.flush()
+        events.flush()
+        backend.close()
+        backends.set_backend(previous)
+
+    return {"session": session_id, "pid": os.getpid(), "directory": directory, "records": records}
+
+
+class SessionManager:
+    """
+    Runs tasks across N concurrent sessions in a process pool.
+    """
+
+    def __init__(
+        self,
+        task_fn,
+        sessions=4,
+        backend="virtual",
+        backend_options=None,
+        processes=None,
+        provider_factory=default_providers,
+        output_dir="sessions",
+    ):
+        """
+        Args:
+            task_fn (callable): Module-level function task_fn(session, task), run for every task
+            sessions (int): Number of concurrent sessions
+            backend (str): 'virtual' or 'xvfb'; every session gets its own display
+            backend_options (dict, optional): Arguments of the backend class
+            processes (int, optional): Worker processes, one per session by default
+            provider_factory (callable, optional): Module-level function returning the
+                                                   providers shared within a process
+            output_dir (str): Directory receiving one subdirectory per session
+        """
+        if backend not in ("virtual", "xvfb"):
+            raise ValueError(f"Sessions need an isolated display backend, not {backend}")
+        self.task_fn = task_fn
+        self.sessions = sessions
+        self.backend = backend
+        self.backend_options = backend_options or {}
+        self.processes = processes or sessions
+        self.provider_factory = provider_factory
+        self.output_dir = output_dir
+
+    def distribute(self, tasks):
+        """
+        Split tasks round-robin across the sessions.
+
+        Returns:
+            list: One list of tasks per session
+        """
+        return [tasks[index :: self.sessions] for index in range(self.sessions)]
+
+    def run(self, tasks):
+        """
+        Run all tasks and wait for every session to finish.
+
+        Args:
+            tasks (list): Picklable task inputs
+
+        Returns:
+            dict: Aggregate and per-session report, see report()
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        # Spawned workers do not inherit the parent's writer threads and locks
+        context = multiprocessing.get_context("spawn")
+        start = time.perf_counter()
+        results = []
+        with ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.provider_factory,),
+        ) as pool:
+            futures = [
+                pool.submit(
+                    run_session,
+                    session_id,
+                    session_tasks,
+                    self.task_fn,
+                    self.backend,
+                    self.backend_options,
+                    self.output_dir,
+                )
+                for session_id, session_tasks in enumerate(self.distribute(tasks))
+                if session_tasks
+            ]
+            for future in as_completed(futures):
+                results.append(future.result())
+        return self.report(sorted(results, key=lambda result: result["session"]), time.perf_counter() - start)
+
+    @staticmethod
+    def report(results, wall_time):
+        """
+        Summarize session results.
+
+        Args:
+            results (list): Return values of run_session
+            wall_time (float): Seconds from start to the last session finishing
+
+        Returns:
+            dict: tasks, errors, wall_time, tasks_per_hour and per-session latency
+        """
+        sessions = []
+        for result in results:
+            latencies = [record["latency"] for record in result["records"] if record["error"] is None]
+            sessions.append(
+                {
+                    "session": result["session"],
+                    "pid": result["pid"],
+                    "directory": result["directory"],
+                    "tasks": len(result["records"]),
+                    "errors": sum(record["error"] is not None for record in result["records"]),
+                    "mean": statistics.mean(latencies) if latencies else None,
+                    "p50": percentile(latencies, 0.5),
+                    "p95": percentile(latencies, 0.95),
+                }
+            )
+        completed = sum(session["tasks"] - session["errors"] for session in sessions)
+        return {
+            "sessions": sessions,
+            "tasks": sum(session["tasks"] for session in sessions),
+            "errors": sum(session["errors"] for session in sessions),
+            "wall_time": wall_time,
+            "tasks_per_hour": completed / wall_time * 3600 if wall_time else 0.0,
+        }
+
+
+def demo_task(session, task):
+    """
+    A self-contained task for smoke tests: click, type, wait for the screen and take a screenshot.
+    """
+    from os_computer_use.actions import run_actions
+    from os_computer_use.logging import logger
+    from os_computer_use.screenshot_base64 import screenshot_to_base64
+    from os_computer_use.settle import wait_until_stable
+
+    run_actions(
+        [
+            {"name": "click_mouse", "parameters": {"x": 200 + task % 400, "y": 150}},
+            {"name": "type_text", "parameters": {"text": f"Task {task} in session {session.id}"}},
+            {"name": "press_key", "parameters": {"key": "enter"}},
+        ],
+        profile="instant",
+    )
+    wait_until_stable(timeout=1.0, interval=0.01)
+    size = len(screenshot_to_base64(save_to_file=False) or "")
+    logger.log(f"Task {task} done in session {session.id}", "green", print=False)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--tasks", type=int, default=40, help="Total number of demo tasks")
+    parser.add_argument("--backend", choices=["virtual", "xvfb"], default="virtual")
+    parser.add_argument("--processes", type=int, help="Worker processes (default: one per session)")
+    parser.add_argument("--output-dir", default="sessions")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    # The demo task needs no models
+    manager = SessionManager(
+        demo_task,
+        sessions=args.sessions,
+        backend=args.backend,
+        processes=args.processes,
+        provider_factory=None,
+        output_dir=args.output_dir,
+    )
+    report = manager.run(list(range(args.tasks)))
+
+    for session in report["sessions"]:
+        p50 = f"{session['p50'] * 1000:.1f} ms" if session["p50"] is not None else "-"
+        p95 = f"{session['p95'] * 1000:.1f} ms" if session["p95"] is not None else "-"
+        print(f"Session {session['session']:3d}: {session['tasks']} tasks, {session['errors']} errors, p50 {p50}, p95 {p95}")
+    print(f"Total: {report['tasks']} tasks, {report['errors']} errors in {report['wall_time']:.1f} s")
+    print(f"Throughput: {report['tasks_per_hour']:.0f} tasks per hour")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Settle - Wait for the screen to stop changing instead of sleeping
+
+This module samples the screen at a high rate, reduces every capture to the
+small grayscale signature used by frame_dedup, and returns as soon as
+consecutive signatures match (wait_until_stable) or differ from a reference
+(wait_for_change). Waits after actions then track how fast the UI actually
+is, rather than a worst-case constant.
+
+Requirements:
+- pillow: pip install pillow
+- An input backend, see backends.py
+"""
+
+import time
+from os_computer_use.backends import get_backend
+from os_computer_use.frame_dedup import DEFAULT_TOLERANCE, frame_signature, frames_match
+from os_computer_use.tracing import span
+
+# Seconds between samples
+DEFAULT_INTERVAL = 0.03
+
+# Size of the signature compared between samples, smaller than frame_dedup's for speed
+SETTLE_SIGNATURE_SIZE = (96, 60)
+
+
+class SettleResult:
+    """
+    Outcome of a wait.
+    """
+
+    def __init__(self, settled, elapsed, samples, image):
+        self.settled = settled  # True if the condition was met before the timeout
+        self.elapsed = elapsed  # Seconds waited
+        self.samples = samples  # Number of captures taken
+        self.image = image  # Last full resolution capture
+
+    def __bool__(self):
+        return self.settled
+
+    def __repr__(self):
+        return f"SettleResult(settled={self.settled}, elapsed={self.elapsed:.3f}, samples={self.samples})"
+
+
+def _capture(region=None):
+    return get_backend().screenshot(region)
+
+
+def wait_until_stable(region=None, timeout=3.0, threshold=DEFAULT_TOLERANCE, interval=DEFAULT_INTERVAL, stable_samples=2):
+    """
+    Wait until consecutive captures of the screen stop changing.
+
+    Args:
+        region (tuple, optional): Region to watch (left, top, width, height)
+        timeout (float): Longest wait in seconds
+        threshold (int): Largest per-pixel signature difference treated as unchanged
+        interval (float): Seconds between samples
+        stable_samples (int): Number of consecutive matching comparisons required
+
+    Returns:
+        SettleResult: Truthy if the screen settled before the timeout
+    """
+    start = time.perf_counter()
+    with span("settle.wait_until_stable") as trace:
+        image = _capture(region)
+        signature = frame_signature(image, SETTLE_SIGNATURE_SIZE)
+        samples, matches = 1, 0
+        while matches < stable_samples:
+            if time.perf_counter() - start >= timeout:
+                break
+            time.sleep(interval)
+            image = _capture(region)
+            current = frame_signature(image, SETTLE_SIGNATURE_SIZE)
+            samples += 1
+            matches = matches + 1 if frames_match(signature, current, threshold) else 0
+            signature = current
+        result = SettleResult(matches >= stable_samples, time.perf_counter() - start, samples, image)
+        trace.set(settled=result.settled, samples=samples)
+    return result
+
+
+def wait_for_change(reference=None, region=None, timeout=2.0, threshold=DEFAULT_TOLERANCE, interval=DEFAULT_INTERVAL):
+    """
+    Wait until the screen differs from a reference, e.g. to check that a click did anything.
+
+    Args:
+        reference (PIL.Image, optional): Capture to compare against, taken now by default.
+                                         Pass a capture from before the action so that
+                                         changes during the action are not missed.
+        region (tuple, optional): Region to watch (left, top, width, height)
+        timeout (float): Longest wait in seconds
+        threshold (int): Largest per-pixel signature difference treated as unchanged
+        interval (float): Seconds between samples
+
+    Returns:
+        SettleResult: Truthy if the screen changed before the timeout
+    """
+    start = time.perf_counter()
+    with span("settle.wait_for_change") as trace:
+        samples = 0
+        if reference is None:
+            reference = _capture(region)
+            samples += 1
+        signature = frame_signature(reference, SETTLE_SIGNATURE_SIZE)
+        changed, image = False, reference
+        while not changed and time.perf_counter() - start < timeout:
+            if samples:
+                time.sleep(interval)
+            image = _capture(region)
+            samples += 1
+            changed = not frames_match(signature, frame_signature(image, SETTLE_SIGNATURE_SIZE), threshold)
+        result = SettleResult(changed, time.perf_counter() - start, samples, image)
+        trace.set(changed=changed, samples=samples)
+    return result
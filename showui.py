@@ -1,7 +1,9 @@
 import ast
+import os
 from datetime import datetime
 from PIL import Image, ImageDraw
 from gradio_client import Client, handle_file
+from os_computer_use.tracing import traced
 
 SHOWUI_HUGGINGFACE_SOURCE = "showlab/ShowUI"
 SHOWUI_HUGGINGFACE_MODEL = "showlab/ShowUI-2B"
@@ -12,8 +14,10 @@ class ShowUIProvider:
     The ShowUI provider is used to make calls to ShowUI.
     """
 
-    def __init__(self):
+    def __init__(self, cache=None):
         self.client = Client(SHOWUI_HUGGINGFACE_SOURCE)
+        # Optional GroundingCache consulted before calling the remote model
+        self.cache = cache
 
     def extract_norm_point(self, response, image_url):
         if isinstance(image_url, str):
@@ -28,7 +32,17 @@ class ShowUIProvider:
         else:
             return None
 
+    @traced("ShowUIProvider.call")
     def call(self, prompt, image_data):
+        # Full screenshots given as a file can be served from the cache
+        image = None
+        if self.cache is not None and isinstance(image_data, str) and os.path.isfile(image_data):
+            with Image.open(image_data) as image:
+                image.load()
+            position = self.cache.lookup(prompt, image)
+            if position is not None:
+                return position
+
         result = self.client.predict(
             image=handle_file(image_data),
             query=prompt,
@@ -39,6 +53,8 @@ class ShowUIProvider:
         pred = result[1]
         img_url = result[0][0]['image']
         result = self.extract_norm_point(pred, img_url)
+        if image is not None:
+            self.cache.store(prompt, image, result)
         return result
 
 if __name__ == "__main__":
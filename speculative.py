@@ -0,0 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+from os_computer_use.grounding_cache import normalize_prompt
+from os_computer_use.logging import logger
+
+
+# Screenshots are given as file paths, encoded bytes or image objects such as a CroppedFrame
+def same_frame(a, b):
+    return a is b or (isinstance(a, (str, bytes)) and a == b)
+
+
+class SpeculativeGrounding:
+    """
+    Starts grounding candidate elements while the action model is still deciding, and keeps the one it picks
+    """
+
+    def __init__(self, grounding_model, max_workers=4):
+        self.grounding_model = grounding_model  # OSAtlasProvider, ShowUIProvider or compatible
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="speculative-grounding"
+        )
+        self.pending = {}  # In-flight grounding by normalized prompt: (future, start time, screenshot)
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "cancelled": 0, "latency_saved": 0.0}
+
+    # Run a grounding call and record how long it took
+    def ground(self, prompt, image_data):
+        start = time.perf_counter()
+        position = self.grounding_model.call(prompt, image_data)
+        return position, time.perf_counter() - start
+
+    # Start grounding the candidate descriptions (e.g. elements named by the vision model)
+    def speculate(self, candidates, image_data):
+        with self.lock:
+            for prompt in candidates:
+                key = normalize_prompt(prompt)
+                if not key:
+                    continue
+                if key in self.pending:
+                    future, _, pending_image = self.pending[key]
+                    if same_frame(pending_image, image_data):
+                        continue
+                    # Started on an older screenshot, ground it again on this one
+                    future.cancel()
+                    self.stats["cancelled"] += 1
+                future = self.executor.submit(self.ground, prompt, image_data)
+                self.pending[key] = (future, time.perf_counter(), image_data)
+
+    # Get the position for the element the action model committed to, cancelling the other calls.
+    # Only a call for the same description on the same screenshot is used: similar descriptions
+    # such as "row 3 delete button" and "row 4 delete button" name different elements.
+    def resolve(self, prompt, image_data):
+        key = normalize_prompt(prompt)
+        with self.lock:
+            pending = self.pending
+            self.pending = {}
+            chosen = pending.pop(key, None)
+            if chosen is not None and not same_frame(chosen[2], image_data):
+                pending[key] = chosen
+                chosen = None
+            for future, _, _ in pending.values():
+                # Calls that are already running finish in the background and are discarded
+                future.cancel()
+            self.stats["cancelled"] += len(pending)
+            if chosen is None:
+                self.stats["misses"] += 1
+
+        if chosen is None:
+            position, _ = self.ground(prompt, image_data)
+            return position
+
+        future, started, _ = chosen
+        waited_from = time.perf_counter()
+        try:
+            position, duration = future.result()
+        except Exception as e:
+            logger.log(f"speculative grounding failed for '{prompt}': {e}", "red")
+            with self.lock:
+                self.stats["misses"] += 1
+            position, _ = self.ground(prompt, image_data)
+            return position
+        # Time saved is the part of the grounding call that overlapped with the action model
+        saved = min(waited_from - started, duration)
+        with self.lock:
+            self.stats["hits"] += 1
+            self.stats["latency_saved"] += saved
+        logger.log(f"speculative grounding hit for '{prompt}', saved {saved:.2f}s", "gray")
+        return position
+
+    # Drop all in-flight calls, e.g. when the screen changed
+    def cancel(self):
+        with self.lock:
+            pending = self.pending
+            self.pending = {}
+            self.stats["cancelled"] += len(pending)
+        for future, _, _ in pending.values():
+            future.cancel()
+
+    @property
+    def hit_rate(self):
+        with self.lock:
+            total = self.stats["hits"] + self.stats["misses"]
+            return self.stats["hits"] / total if total else 0.0
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
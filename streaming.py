@@ -0,0 +1,121 @@
+import json
+
+
+class JsonObjectScanner:
+    """
+    Finds complete top-level JSON objects in text that arrives in chunks
+    """
+
+    def __init__(self):
+        self.buffer = []  # Characters of the object being read
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    # Feed a chunk of text and return the objects completed by it, as strings
+    def feed(self, text):
+        objects = []
+        for char in text:
+            if self.depth == 0:
+                # Skip anything outside of an object
+                if char == "{":
+                    self.depth = 1
+                    self.buffer = [char]
+                continue
+
+            self.buffer.append(char)
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == "{":
+                self.depth += 1
+            elif char == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    objects.append("".join(self.buffer))
+                    self.buffer = []
+        return objects
+
+
+class ToolCallStreamParser:
+    """
+    Assembles tool calls from a streamed completion and reports each one as soon as its arguments are complete
+    """
+
+    def __init__(self, create_tool_call):
+        self.create_tool_call = create_tool_call  # Builds our tool call object from a name and parameters
+        self.native = {}  # Native tool calls being streamed, by index
+        self.content = []  # Streamed response text
+        self.inline_scanner = JsonObjectScanner()
+        self.inline_calls = []  # Tool calls emitted from the response text
+        self.tool_calls = []  # All complete tool calls, in the order they were emitted
+
+    # Handle a tool_calls delta, returning the tool calls completed by it
+    def add_tool_call_delta(self, delta):
+        index = delta.index if delta.index is not None else len(self.native)
+        entry = self.native.setdefault(
+            index, {"name": "", "arguments": "", "scanner": JsonObjectScanner(), "done": False}
+        )
+        function = delta.function
+        if function is None or entry["done"]:
+            return []
+        if function.name:
+            entry["name"] += function.name
+        entry["arguments"] += function.arguments or ""
+
+        for arguments in entry["scanner"].feed(function.arguments or ""):
+            parameters = self.parse(arguments)
+            if parameters is not None and entry["name"]:
+                entry["done"] = True
+                return [self.emit(entry["name"], parameters)]
+        return []
+
+    # Handle streamed response text, returning the tool calls written inline in it that it completes
+    def add_content(self, text):
+        self.content.append(text)
+        completed = []
+        # Sometimes, function calls are returned unparsed by the inference provider. Like call(),
+        # they are only used when the completion has no native tool calls, so they are emitted as
+        # soon as their object closes unless a native tool call has been streamed already
+        for candidate in self.inline_scanner.feed(text):
+            tool_call = self.parse(candidate)
+            if self.native or not isinstance(tool_call, dict):
+                continue
+            # Some models use "arguments" as the key instead of "parameters"
+            parameters = tool_call.get("parameters", tool_call.get("arguments"))
+            if tool_call.get("name") and parameters:
+                emitted = self.emit(tool_call["name"], parameters)
+                self.inline_calls.append(emitted)
+                completed.append(emitted)
+        return completed
+
+    # At the end of the stream, return the remaining tool calls: native calls without arguments
+    def finish(self):
+        completed = []
+        for entry in self.native.values():
+            # Calls with no arguments at all take no parameters; unparseable arguments are dropped
+            if not entry["done"] and entry["name"] and not entry["arguments"].strip():
+                entry["done"] = True
+                completed.append(self.emit(entry["name"], {}))
+        return completed
+
+    @property
+    def text(self):
+        return "".join(self.content)
+
+    def parse(self, s):
+        try:
+            return json.loads(s)
+        except json.JSONDecodeError:
+            return None
+
+    def emit(self, name, parameters):
+        tool_call = self.create_tool_call(name, parameters)
+        self.tool_calls.append(tool_call)
+        return tool_call
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the image, message and parsing hot paths
+
+This script runs headless: screenshots are synthesized in-process at 1440p and
+5K, so no display or API keys are needed. Results are written as JSON and can
+be compared against a stored baseline to catch regressions.
+
+Run it with the os_computer_use package importable, e.g. with PYTHONPATH set
+to the directory containing the package. Do not put the package directory
+itself on the path: its logging.py would shadow the standard library module.
+
+Usage:
+    python tests/benchmarks.py --output bench.json
+    python tests/benchmarks.py --save-baseline tests/benchmark_baseline.json
+    python tests/benchmarks.py --baseline tests/benchmark_baseline.json --tolerance 0.25
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+from os_computer_use import providers
+from os_computer_use.image import image_to_base64, pil_image_to_base64
+from os_computer_use.grounding import extract_bbox_midpoint
+from os_computer_use.logging import Logger
+
+# Screen sizes benchmarked (width, height)
+SCREEN_SIZES = {"1440p": (2560, 1440), "5k": (5120, 2880)}
+
+# Tool definitions shaped like the ones the agent passes to call()
+TOOL_DEFINITIONS = {
+    name: {
+        "description": f"{name} on the screen",
+        "params": {"x": "X coordinate", "y": "Y coordinate", "button": "Mouse button"},
+    }
+    for name in ["click", "double_click", "move_mouse", "drag", "scroll", "type_text", "press_key"]
+}
+
+# Sample responses from the grounding model
+BBOX_RESPONSES = [
+    "<|box_start|>(120,340),(410,372)<|box_end|>",
+    "The element is at [0.52, 0.31]",
+    "<|object_ref_start|>search box<|object_ref_end|><|box_start|>(1020,88),(1530,120)<|box_end|>",
+]
+
+
+def synthetic_screenshot(size, seed=0):
+    """
+    Draw a screenshot-like image: windows, toolbars, text and a photo-like region.
+
+    Args:
+        size (tuple): (width, height) of the image
+        seed (int): Varies the layout so consecutive frames differ
+
+    Returns:
+        PIL.Image: RGB image
+    """
+    width, height = size
+    image = Image.new("RGB", size, (236, 236, 236))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, width, height // 30], fill=(220, 220, 225))
+    for window in range(4):
+        left = (window * width // 5 + seed * 37) % (width // 2)
+        top = height // 10 + window * height // 8
+        right, bottom = left + width // 2, top + height // 2
+        draw.rectangle([left, top, right, bottom], fill=(255, 255, 255), outline=(180, 180, 180))
+        for line in range(0, height // 2 - 40, 24):
+            draw.text((left + 20, top + 30 + line), f"Line {line} of window {window} step {seed}", fill=(30, 30, 30))
+    # A noisy region compresses like a photo or video does
+    noise = Image.effect_noise((width // 4, height // 4), 60).convert("RGB")
+    image.paste(noise, (width - width // 4 - 20, height - height // 4 - 20))
+    return image
+
+
+def encode_png(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class BenchmarkOpenAIProvider(providers.OpenAIBaseProvider):
+    api_key = "benchmark"
+
+    def create_client(self):
+        return None
+
+
+class BenchmarkAnthropicProvider(providers.AnthropicBaseProvider):
+    api_key = "benchmark"
+
+    def create_client(self):
+        return None
+
+
+class BenchmarkMistralProvider(providers.MistralBaseProvider):
+    api_key = "benchmark"
+
+    def create_client(self):
+        return None
+
+
+PROVIDERS = {
+    "openai": BenchmarkOpenAIProvider,
+    "anthropic": BenchmarkAnthropicProvider,
+    "mistral": BenchmarkMistralProvider,
+}
+
+
+def measure(func, repeat=5, number=1, setup=None):
+    """
+    Time a function.
+
+    Args:
+        func (callable): Function to time, called without arguments
+        repeat (int): Number of timed samples
+        number (int): Calls per sample
+        setup (callable, optional): Called before each sample, not timed
+
+    Returns:
+        dict: Per-call timings in seconds (median, mean, min) and the sample count
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "median": statistics.median(samples),
+        "mean": statistics.mean(samples),
+        "min": min(samples),
+        "samples": repeat,
+    }
+
+
+def history(screenshots, length):
+    """
+    Build a message history with one screenshot per user turn.
+    """
+    messages = [{"role": "system", "content": "You are a computer use agent."}]
+    for step in range(length):
+        messages.append({"role": "user", "content": [f"Step {step}", screenshots[step % len(screenshots)]]})
+        messages.append({"role": "assistant", "content": f"Clicked element {step}"})
+    return messages
+
+
+def run_benchmarks(quick=False):
+    """
+    Run every benchmark.
+
+    Args:
+        quick (bool): Use fewer samples and sizes, for smoke runs
+
+    Returns:
+        dict: Timings by benchmark name
+    """
+    results = {}
+    repeat = 2 if quick else 5
+    sizes = {"1440p": SCREEN_SIZES["1440p"]} if quick else SCREEN_SIZES
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size_name, size in sizes.items():
+            image = synthetic_screenshot(size)
+            png = encode_png(image)
+            path = os.path.join(directory, f"screenshot_{size_name}.png")
+            with open(path, "wb") as f:
+                f.write(png)
+
+            results[f"image_to_base64[{size_name}]"] = measure(lambda: image_to_base64(path), repeat)
+            results[f"pil_image_to_base64[{size_name}]"] = measure(lambda: pil_image_to_base64(image), repeat)
+
+            for provider_name, provider_class in PROVIDERS.items():
+                provider = provider_class("benchmark")
+                results[f"create_image_block[{provider_name},{size_name}]"] = measure(
+                    lambda: provider.create_image_block(png), repeat
+                )
+
+        # Message transforms over growing histories, cold and with the image block cache warm
+        screenshots = [encode_png(synthetic_screenshot(SCREEN_SIZES["1440p"], seed)) for seed in range(4)]
+        for provider_name, provider_class in PROVIDERS.items():
+            provider = provider_class("benchmark")
+            for length in [1, 10] if quick else [1, 10, 50]:
+                messages = history(screenshots, length)
+                transform = lambda: [provider.transform_message(message) for message in messages]
+                results[f"transform_message[{provider_name},cold,{length}]"] = measure(
+                    transform, repeat, setup=provider.image_cache.clear
+                )
+                results[f"transform_message[{provider_name},warm,{length}]"] = measure(transform, repeat)
+
+            # Building the schema, and looking it up in the tool schema registry once built
+            results[f"build_function_schema[{provider_name}]"] = measure(
+                lambda: provider.build_function_schema(TOOL_DEFINITIONS), repeat, number=1000
+            )
+            results[f"create_function_schema[{provider_name},cached]"] = measure(
+                lambda: provider.create_function_schema(TOOL_DEFINITIONS), repeat, number=1000
+            )
+
+        results["extract_bbox_midpoint"] = measure(
+            lambda: [extract_bbox_midpoint(response) for response in BBOX_RESPONSES], repeat, number=1000
+        )
+
+        # Logging with a log file attached, including the time for the writer to catch up
+        logger = Logger()
+        logger.log_file = os.path.join(directory, "log.html")
+
+        def log_lines():
+            for line in range(200):
+                logger.log(f"Benchmark log line {line}", "blue", print=False)
+            logger.flush()
+
+        results["Logger.log[200 lines]"] = measure(log_lines, repeat)
+        logger.close()
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Find benchmarks that got slower than the baseline allows.
+
+    Args:
+        results (dict): Timings from run_benchmarks()
+        baseline (dict): Timings from an earlier run
+        tolerance (float): Allowed relative slowdown of the median, e.g. 0.25 for 25%
+
+    Returns:
+        list: (name, baseline median, current median) for each regression
+    """
+    regressions = []
+    for name, timing in results.items():
+        reference = baseline.get(name)
+        if reference and timing["median"] > reference["median"] * (1 + tolerance):
+            regressions.append((name, reference["median"], timing["median"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against results stored in this file")
+    parser.add_argument("--save-baseline", help="Store results as the new baseline in this file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown (default: 0.25)")
+    parser.add_argument("--quick", action="store_true", help="Fewer samples and sizes")
+    args = parser.parse_args()
+
+    results = run_benchmarks(quick=args.quick)
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    for name, timing in results.items():
+        print(f"{name:<55} {timing['median'] * 1000:10.3f} ms")
+
+    for path in [args.output, args.save_baseline]:
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"Results saved: {path}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
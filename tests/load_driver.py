@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Load driver for the agent's LLM calls against the local mock server
+
+Each worker thread runs agent-like steps: a user turn with a synthetic
+screenshot followed by provider.call() with the tool definitions. Step latency
+percentiles and calls per second are reported at the end. By default a mock
+server is started in-process; pass --base-url to target one started with
+tests/mock_server.py (or any compatible endpoint).
+
+Clients are created without retries by default, so that the errors injected
+by the mock server are counted rather than hidden behind SDK retries. Like
+tests/benchmarks.py, run it with the os_computer_use package importable.
+
+Usage:
+    python tests/load_driver.py --provider openai --threads 8 --steps 50 --latency 0.3
+    python tests/load_driver.py --provider anthropic --jitter 0.2 --rate-limit-rate 0.05
+    python tests/load_driver.py --stream --tool-mode inline
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+
+from mock_server import MockConfig, start_server
+from benchmarks import TOOL_DEFINITIONS, encode_png, synthetic_screenshot
+from os_computer_use import providers
+
+
+def make_provider(kind, base_url, max_retries=0):
+    """
+    Create a provider pointed at base_url by overriding the class attributes.
+
+    Args:
+        kind (str): "openai" or "anthropic"
+        base_url (str): Mock server URL ending in /v1
+        max_retries (int): Retries of the API client on 429 and 5xx responses
+
+    Returns:
+        LLMProvider: Provider instance
+    """
+    if kind == "openai":
+        base, url = providers.OpenAIBaseProvider, base_url
+    else:
+        # The Anthropic SDK appends /v1/messages itself
+        base, url = providers.AnthropicBaseProvider, base_url.rsplit("/v1", 1)[0]
+
+    class MockProvider(base):
+        base_url = url
+        api_key = "mock"
+
+    MockProvider.max_retries = max_retries
+
+    return MockProvider("mock-model")
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def run_load(provider, threads=4, steps=20, stream=False, screenshot=None):
+    """
+    Run steps on several threads sharing one provider.
+
+    Args:
+        provider (LLMProvider): Provider to call
+        threads (int): Number of concurrent workers
+        steps (int): Steps per worker
+        stream (bool): Use stream_call() instead of call() (OpenAI providers only)
+        screenshot (bytes, optional): PNG sent with each step
+
+    Returns:
+        dict: Step latencies in seconds, error count, wall time and calls per second
+    """
+    screenshot = screenshot or encode_png(synthetic_screenshot((1280, 800)))
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        for step in range(steps):
+            messages = [
+                {"role": "system", "content": "You are a computer use agent."},
+                {"role": "user", "content": [f"Worker {worker_id} step {step}", screenshot]},
+            ]
+            start = time.perf_counter()
+            try:
+                if stream:
+                    provider.stream_call(messages, TOOL_DEFINITIONS)
+                else:
+                    provider.call(messages, TOOL_DEFINITIONS)
+            except Exception as e:
+                with lock:
+                    errors.append(type(e).__name__)
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,), name=f"load-{i}") for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    wall_time = time.perf_counter() - start
+
+    return {
+        "steps": len(latencies),
+        "errors": len(errors),
+        "error_types": {name: errors.count(name) for name in set(errors)},
+        "wall_time": wall_time,
+        "calls_per_second": len(latencies) / wall_time if wall_time else 0.0,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "mean": statistics.mean(latencies) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--provider", choices=["openai", "anthropic"], default="openai")
+    parser.add_argument("--base-url", help="Use a running server instead of starting one")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--steps", type=int, default=20, help="Steps per thread")
+    parser.add_argument("--stream", action="store_true", help="Use stream_call (openai only)")
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--tool-mode", choices=["native", "inline", "none"], default="native")
+    parser.add_argument("--max-retries", type=int, default=0, help="SDK retries on 429 and 5xx (default: 0)")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    if args.stream and args.provider != "openai":
+        parser.error("--stream is only supported with --provider openai")
+
+    base_url = args.base_url
+    if base_url is None:
+        config = MockConfig(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            retry_after=0,
+            tool_mode=args.tool_mode,
+        )
+        _, base_url = start_server(config=config)
+
+    provider = make_provider(args.provider, base_url, args.max_retries)
+    report = run_load(provider, args.threads, args.steps, args.stream)
+
+    print(f"Steps:            {report['steps']} ({report['errors']} errors)")
+    if report["p50"] is not None:
+        print(f"Step latency p50: {report['p50'] * 1000:.1f} ms")
+        print(f"Step latency p99: {report['p99'] * 1000:.1f} ms")
+    print(f"Calls per second: {report['calls_per_second']:.2f}")
+    if report["error_types"]:
+        print(f"Errors:           {report['error_types']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved: {args.output}")
+
+    if report["steps"] == 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
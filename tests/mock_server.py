@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Mock LLM Server - A local stand-in for the OpenAI and Anthropic APIs
+
+This server speaks the chat-completions (POST /v1/chat/completions) and
+messages (POST /v1/messages) wire formats used by OpenAIBaseProvider and
+AnthropicBaseProvider, including tool calls, the inline-JSON tool call quirk
+and streaming. Latency, error rate and rate limiting are configurable, so the
+agent loop can be load tested without API quota.
+
+Usage:
+    python tests/mock_server.py --port 8000 --latency 0.5 --jitter 0.2 --tool-mode inline
+
+Point a provider at it by overriding base_url, e.g.
+    class MockProvider(OpenAIBaseProvider):
+        base_url = "http://127.0.0.1:8000/v1"
+        api_key = "mock"
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockConfig:
+    """
+    Behaviour of the mock server.
+    """
+
+    def __init__(
+        self,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        rate_limit_rate=0.0,
+        retry_after=1,
+        tool_mode="native",
+        text="I will click on the element.",
+        stream_chunk_delay=0.0,
+    ):
+        self.latency = latency  # Seconds before the response (or first chunk)
+        self.jitter = jitter  # Random extra latency, uniform in [0, jitter]
+        self.error_rate = error_rate  # Fraction of requests answered with HTTP 500
+        self.rate_limit_rate = rate_limit_rate  # Fraction of requests answered with HTTP 429
+        self.retry_after = retry_after  # Retry-After header of rate limited responses
+        self.tool_mode = tool_mode  # "native", "inline" or "none"
+        self.text = text  # Response text
+        self.stream_chunk_delay = stream_chunk_delay  # Seconds between streamed chunks
+
+
+def pick_tool_call(tools):
+    """
+    Choose the tool to call and make up string arguments for its parameters.
+
+    Args:
+        tools (list): Tool definitions from the request, in OpenAI or Anthropic format
+
+    Returns:
+        tuple: (name, arguments dict) or None if there are no tools
+    """
+    if not tools:
+        return None
+    tool = tools[0]
+    function = tool.get("function", tool)
+    schema = function.get("parameters") or function.get("input_schema") or {}
+    arguments = {name: str(random.randint(0, 1000)) for name in schema.get("properties", {})}
+    return function["name"], arguments
+
+
+def split_text(text, size=8):
+    return [text[i : i + size] for i in range(0, len(text), size)] or [""]
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    config = MockConfig()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def start_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+    def send_event(self, data, event=None):
+        if event:
+            self.wfile.write(f"event: {event}\n".encode("utf-8"))
+        self.wfile.write(f"data: {data if isinstance(data, str) else json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+        if self.config.stream_chunk_delay:
+            time.sleep(self.config.stream_chunk_delay)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        config = self.config
+        time.sleep(config.latency + random.uniform(0, config.jitter))
+
+        roll = random.random()
+        if roll < config.rate_limit_rate:
+            return self.send_json(
+                429,
+                {"error": {"type": "rate_limit_error", "message": "Rate limit exceeded"}},
+                {"Retry-After": str(config.retry_after)},
+            )
+        if roll < config.rate_limit_rate + config.error_rate:
+            return self.send_json(500, {"error": {"type": "api_error", "message": "Injected error"}})
+
+        if self.path.rstrip("/").endswith("/chat/completions"):
+            return self.chat_completion(request)
+        if self.path.rstrip("/").endswith("/messages"):
+            return self.messages(request)
+        self.send_json(404, {"error": {"type": "not_found", "message": self.path}})
+
+    # OpenAI chat completions
+    def chat_completion(self, request):
+        config = self.config
+        tool_call = pick_tool_call(request.get("tools")) if config.tool_mode != "none" else None
+        text = config.text
+        native_calls = []
+        if tool_call and config.tool_mode == "inline":
+            # Some inference providers return the tool call as JSON in the content
+            text = json.dumps({"name": tool_call[0], "parameters": tool_call[1]})
+        elif tool_call:
+            native_calls = [
+                {
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {"name": tool_call[0], "arguments": json.dumps(tool_call[1])},
+                }
+            ]
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model = request.get("model", "mock")
+
+        if not request.get("stream"):
+            message = {"role": "assistant", "content": text}
+            if native_calls:
+                message["tool_calls"] = native_calls
+            return self.send_json(
+                200,
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": message,
+                            "finish_reason": "tool_calls" if native_calls else "stop",
+                        }
+                    ],
+                    "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+                },
+            )
+
+        def chunk(delta, finish_reason=None):
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+
+        self.start_stream()
+        self.send_event(chunk({"role": "assistant", "content": ""}))
+        for index, call in enumerate(native_calls):
+            arguments = call["function"]["arguments"]
+            self.send_event(
+                chunk(
+                    {
+                        "tool_calls": [
+                            {
+                                "index": index,
+                                "id": call["id"],
+                                "type": "function",
+                                "function": {"name": call["function"]["name"], "arguments": ""},
+                            }
+                        ]
+                    }
+                )
+            )
+            for part in split_text(arguments):
+                self.send_event(
+                    chunk({"tool_calls": [{"index": index, "function": {"arguments": part}}]})
+                )
+        for part in split_text(text):
+            self.send_event(chunk({"content": part}))
+        self.send_event(chunk({}, "tool_calls" if native_calls else "stop"))
+        self.send_event("[DONE]")
+
+    # Anthropic messages
+    def messages(self, request):
+        config = self.config
+        tool_call = pick_tool_call(request.get("tools")) if config.tool_mode != "none" else None
+        content = [{"type": "text", "text": config.text}]
+        if tool_call:
+            content.append(
+                {
+                    "type": "tool_use",
+                    "id": f"toolu_{uuid.uuid4().hex[:12]}",
+                    "name": tool_call[0],
+                    "input": tool_call[1],
+                }
+            )
+        message_id = f"msg_{uuid.uuid4().hex[:12]}"
+        model = request.get("model", "mock")
+        stop_reason = "tool_use" if tool_call else "end_turn"
+
+        if not request.get("stream"):
+            return self.send_json(
+                200,
+                {
+                    "id": message_id,
+                    "type": "message",
+                    "role": "assistant",
+                    "model": model,
+                    "content": content,
+                    "stop_reason": stop_reason,
+                    "stop_sequence": None,
+                    "usage": {"input_tokens": 100, "output_tokens": 20},
+                },
+            )
+
+        self.start_stream()
+        self.send_event(
+            {
+                "type": "message_start",
+                "message": {
+                    "id": message_id,
+                    "type": "message",
+                    "role": "assistant",
+                    "model": model,
+                    "content": [],
+                    "stop_reason": None,
+                    "stop_sequence": None,
+                    "usage": {"input_tokens": 100, "output_tokens": 0},
+                },
+            },
+            "message_start",
+        )
+        for index, block in enumerate(content):
+            if block["type"] == "text":
+                start = {"type": "text", "text": ""}
+                deltas = [{"type": "text_delta", "text": part} for part in split_text(block["text"])]
+            else:
+                start = {"type": "tool_use", "id": block["id"], "name": block["name"], "input": {}}
+                deltas = [
+                    {"type": "input_json_delta", "partial_json": part}
+                    for part in split_text(json.dumps(block["input"]))
+                ]
+            self.send_event(
+                {"type": "content_block_start", "index": index, "content_block": start},
+                "content_block_start",
+            )
+            for delta in deltas:
+                self.send_event(
+                    {"type": "content_block_delta", "index": index, "delta": delta},
+                    "content_block_delta",
+                )
+            self.send_event({"type": "content_block_stop", "index": index}, "content_block_stop")
+        self.send_event(
+            {
+                "type": "message_delta",
+                "delta": {"stop_reason": stop_reason, "stop_sequence": None},
+                "usage": {"output_tokens": 20},
+            },
+            "message_delta",
+        )
+        self.send_event({"type": "message_stop"}, "message_stop")
+
+
+def start_server(host="127.0.0.1", port=0, config=None):
+    """
+    Start the mock server on a background thread.
+
+    Args:
+        host (str): Interface to listen on
+        port (int): Port to listen on, 0 picks a free one
+        config (MockConfig, optional): Server behaviour
+
+    Returns:
+        tuple: (server, base_url) where base_url ends in /v1
+    """
+    handler = type("ConfiguredMockHandler", (MockHandler,), {"config": config or MockConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="mock-llm-server", daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI/Anthropic-compatible mock server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Base latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of HTTP 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of HTTP 429 responses")
+    parser.add_argument("--tool-mode", choices=["native", "inline", "none"], default="native")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Seconds between streamed chunks")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        tool_mode=args.tool_mode,
+        stream_chunk_delay=args.chunk_delay,
+    )
+    server, base_url = start_server(args.host, args.port, config)
+    print(f"Mock server listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
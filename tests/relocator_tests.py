@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the template relocator
+
+These tests run headless on synthetic forms and check that elements are only
+relocated when the match is unambiguous.
+"""
+
+import unittest
+from PIL import Image, ImageDraw
+
+from os_computer_use.relocator import TemplateRelocator
+
+# Positions of five identical text boxes, as (left, top)
+FIELDS = [(150, 100 + index * 95) for index in range(5)]
+FIELD_SIZE = (300, 50)
+
+
+def draw_form(fields=FIELDS, size=(800, 620)):
+    """Draw a form with identical text boxes at the given positions"""
+    image = Image.new("RGB", size, (245, 245, 245))
+    draw = ImageDraw.Draw(image)
+    for left, top in fields:
+        draw.rectangle([left, top, left + FIELD_SIZE[0], top + FIELD_SIZE[1]], fill="white", outline=(120, 120, 120))
+        draw.rectangle([left + 10, top + 15, left + 14, top + 35], fill=(40, 40, 40))
+    return image
+
+
+def field_center(left, top):
+    return left + 40, top + FIELD_SIZE[1] // 2
+
+
+class RepeatedWidgetTests(unittest.TestCase):
+    """Relocation on forms with repeated identical widgets"""
+
+    def test_unchanged_frame_returns_grounded_field(self):
+        """On an unchanged frame the remembered field is found where it was grounded"""
+        form = draw_form()
+        position = field_center(*FIELDS[4])
+        relocator = TemplateRelocator()
+        relocator.remember("email field", form, position)
+
+        located, score = relocator.locate("email field", form)
+        self.assertEqual(located, position)
+        self.assertGreater(score, 0.9)
+
+    def test_moved_repeated_widgets_are_ambiguous(self):
+        """When every field moved, identical candidates are rejected instead of guessed"""
+        relocator = TemplateRelocator()
+        relocator.remember("email field", draw_form(), field_center(*FIELDS[4]))
+
+        shifted = draw_form([(left + 120, top + 20) for left, top in FIELDS])
+        located, _ = relocator.locate("email field", shifted)
+        self.assertIsNone(located)
+        self.assertEqual(relocator.stats["ambiguous"], 1)
+
+    def test_unique_widget_is_relocated_after_moving(self):
+        """A single widget is still found after it moved"""
+        relocator = TemplateRelocator()
+        relocator.remember("email field", draw_form(FIELDS[:1]), field_center(*FIELDS[0]))
+
+        located, _ = relocator.locate("email field", draw_form([(400, 300)]))
+        self.assertEqual(located, field_center(400, 300))
+
+    def test_flat_template_is_not_kept(self):
+        """Crops without texture would match anywhere and are skipped"""
+        relocator = TemplateRelocator()
+        relocator.remember("empty area", draw_form(), (700, 40))
+        self.assertEqual(relocator.locate("empty area", draw_form())[0], None)
+        self.assertEqual(len(relocator.templates), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
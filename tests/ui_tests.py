@@ -8,7 +8,7 @@ It includes both automated tests and interactive tests that require user verific
 
 import time
 import unittest
-from tools import (
+from os_computer_use.tools import (
     move_mouse, click_mouse, double_click, drag_mouse, get_mouse_position,
     type_text, press_key, press_hotkey, key_down, key_up
 )
@@ -3,21 +3,36 @@
 Mac Control Tools - Simple mouse and keyboard control for macOS
 
 This module provides basic functions to control mouse movement and keyboard input
-on macOS systems, designed to be used by AI models.
+on macOS systems, designed to be used by AI models. Input goes through the
+backend returned by backends.get_backend(), pyautogui by default.
 
 Requirements:
-- pyautogui: pip install pyautogui
+- pyautogui: pip install pyautogui (default input backend, see backends.py)
+- pyperclip (optional, for pasting long text): pip install pyperclip
 """
 
-import pyautogui
 import time
+from os_computer_use.backends import ClipboardError, get_backend
+from os_computer_use.settle import wait_for_change
+from os_computer_use.tracing import traced
 
-# Configure PyAutoGUI settings
-pyautogui.FAILSAFE = True  # Move mouse to upper-left corner to abort
-pyautogui.PAUSE = 0.1  # Add small pause between PyAutoGUI commands
+# Text at least this long is pasted through the clipboard instead of typed
+PASTE_MIN_LENGTH = 32
+
+# Characters pyautogui.write types as key presses (Enter, Tab, Backspace) rather than as text
+SPECIAL_KEY_CHARS = set("\n\r\t\b")
+
+# Seconds to let the target application read the clipboard before it is restored, when the
+# paste does not show on screen. Applications read it when they handle the paste shortcut,
+# which can take a while under load.
+PASTE_RESTORE_DELAY = 0.5
+
+# Seconds to wait for a paste to show on screen
+PASTE_VERIFY_TIMEOUT = 1.0
 
 # ===== MOUSE FUNCTIONS =====
 
+@traced("tools.move_mouse")
 def move_mouse(x, y, duration=0.2):
     """
     Move the mouse cursor to the specified coordinates.
@@ -30,10 +45,12 @@ def move_mouse(x, y, duration=0.2):
     Returns:
         tuple: The new position (x, y) of the mouse
     """
-    pyautogui.moveTo(x, y, duration=duration)
-    return pyautogui.position()
+    backend = get_backend()
+    backend.move_to(x, y, duration=duration)
+    return backend.position()
 
-def click_mouse(button='left', x=None, y=None):
+@traced("tools.click_mouse")
+def click_mouse(button='left', x=None, y=None, duration=0.2):
     """
     Click the mouse at the current position or at specified coordinates.
     
@@ -41,25 +58,29 @@ def click_mouse(button='left', x=None, y=None):
         button (str): Mouse button to click ('left', 'right', or 'middle')
         x (int, optional): X-coordinate to move to before clicking
         y (int, optional): Y-coordinate to move to before clicking
+        duration (float): Time in seconds the movement to (x, y) should take
     """
     if x is not None and y is not None:
-        move_mouse(x, y)
+        move_mouse(x, y, duration)
     
-    pyautogui.click(button=button)
+    get_backend().click(button=button)
 
-def double_click(x=None, y=None):
+@traced("tools.double_click")
+def double_click(x=None, y=None, duration=0.2):
     """
     Double-click the left mouse button.
     
     Args:
         x (int, optional): X-coordinate to move to before clicking
         y (int, optional): Y-coordinate to move to before clicking
+        duration (float): Time in seconds the movement to (x, y) should take
     """
     if x is not None and y is not None:
-        move_mouse(x, y)
+        move_mouse(x, y, duration)
     
-    pyautogui.doubleClick()
+    get_backend().click(clicks=2)
 
+@traced("tools.drag_mouse")
 def drag_mouse(start_x, start_y, end_x, end_y, duration=0.2):
     """
     Click and drag from one position to another.
@@ -71,9 +92,11 @@ def drag_mouse(start_x, start_y, end_x, end_y, duration=0.2):
         end_y (int): Ending Y-coordinate
         duration (float): Time in seconds the drag should take
     """
-    pyautogui.moveTo(start_x, start_y)
-    pyautogui.dragTo(end_x, end_y, duration=duration)
+    backend = get_backend()
+    backend.move_to(start_x, start_y)
+    backend.drag_to(end_x, end_y, duration=duration)
 
+@traced("tools.get_mouse_position")
 def get_mouse_position():
     """
     Get the current mouse cursor position.
@@ -81,11 +104,12 @@ def get_mouse_position():
     Returns:
         tuple: Current (x, y) position of the mouse
     """
-    return pyautogui.position()
+    return get_backend().position()
 
 # ===== SCROLLING FUNCTIONS =====
 
-def scroll(clicks, x=None, y=None):
+@traced("tools.scroll")
+def scroll(clicks, x=None, y=None, duration=0.2):
     """
     Scroll the mouse wheel by the specified number of "clicks".
     Positive values scroll up, negative values scroll down.
@@ -94,13 +118,15 @@ def scroll(clicks, x=None, y=None):
         clicks (int): Number of "clicks" to scroll. Positive scrolls up, negative scrolls down.
         x (int, optional): X-coordinate to move to before scrolling
         y (int, optional): Y-coordinate to move to before scrolling
+        duration (float): Time in seconds the movement to (x, y) should take
     """
     if x is not None and y is not None:
-        move_mouse(x, y)
+        move_mouse(x, y, duration)
     
-    pyautogui.scroll(clicks)
+    get_backend().scroll(clicks)
 
-def scroll_down(amount=3, x=None, y=None):
+@traced("tools.scroll_down")
+def scroll_down(amount=3, x=None, y=None, duration=0.2):
     """
     Scroll down by a specified amount.
     
@@ -108,10 +134,12 @@ def scroll_down(amount=3, x=None, y=None):
         amount (int): Number of "clicks" to scroll down (default: 3)
         x (int, optional): X-coordinate to move to before scrolling
         y (int, optional): Y-coordinate to move to before scrolling
+        duration (float): Time in seconds the movement to (x, y) should take
     """
-    scroll(-amount, x, y)
+    scroll(-amount, x, y, duration)
 
-def scroll_up(amount=3, x=None, y=None):
+@traced("tools.scroll_up")
+def scroll_up(amount=3, x=None, y=None, duration=0.2):
     """
     Scroll up by a specified amount.
     
@@ -119,61 +147,177 @@ def scroll_up(amount=3, x=None, y=None):
         amount (int): Number of "clicks" to scroll up (default: 3)
         x (int, optional): X-coordinate to move to before scrolling
         y (int, optional): Y-coordinate to move to before scrolling
+        duration (float): Time in seconds the movement to (x, y) should take
     """
-    scroll(amount, x, y)
+    scroll(amount, x, y, duration)
 
-def page_down(x=None, y=None):
+@traced("tools.page_down")
+def page_down(x=None, y=None, duration=0.2):
     """
     Scroll down by a larger amount (equivalent to Page Down).
     
     Args:
         x (int, optional): X-coordinate to move to before scrolling
         y (int, optional): Y-coordinate to move to before scrolling
+        duration (float): Time in seconds the movement to (x, y) should take
     """
-    scroll_down(10, x, y)
+    scroll_down(10, x, y, duration)
 
-def page_up(x=None, y=None):
+@traced("tools.page_up")
+def page_up(x=None, y=None, duration=0.2):
     """
     Scroll up by a larger amount (equivalent to Page Up).
     
     Args:
         x (int, optional): X-coordinate to move to before scrolling
         y (int, optional): Y-coordinate to move to before scrolling
+        duration (float): Time in seconds the movement to (x, y) should take
     """
-    scroll_up(10, x, y)
+    scroll_up(10, x, y, duration)
 
+@traced("tools.scroll_to_top")
 def scroll_to_top():
     """
     Attempt to scroll to the top of the current view.
     This uses keyboard shortcut Command+Home or Home depending on context.
     """
+    backend = get_backend()
     try:
-        pyautogui.hotkey('command', 'home')
+        backend.hotkey('command', 'home')
     except:
-        pyautogui.press('home')
+        backend.press('home')
 
+@traced("tools.scroll_to_bottom")
 def scroll_to_bottom():
     """
     Attempt to scroll to the bottom of the current view.
     This uses keyboard shortcut Command+End or End depending on context.
     """
+    backend = get_backend()
     try:
-        pyautogui.hotkey('command', 'end')
+        backend.hotkey('command', 'end')
     except:
-        pyautogui.press('end')
+        backend.press('end')
 
 # ===== KEYBOARD FUNCTIONS =====
 
-def type_text(text, interval=0.05):
+def choose_typing_strategy(text, strategy="auto"):
+    """
+    Decide how text is entered.
+    
+    Short text and text containing special keys (newline, tab, backspace) is
+    typed, so that those keys keep their effect. Long text, and text with
+    characters pyautogui cannot type, is pasted when the backend has a clipboard.
+    
+    Args:
+        text (str): The text to enter
+        strategy (str): 'auto', 'keystroke' or 'paste'
+    
+    Returns:
+        str: 'keystroke' or 'paste'
+    """
+    if strategy not in ("auto", "keystroke", "paste"):
+        raise ValueError(f"Unknown typing strategy: {strategy}")
+    if strategy != "auto":
+        return strategy
+    if not get_backend().has_clipboard or SPECIAL_KEY_CHARS.intersection(text):
+        return "keystroke"
+    if len(text) >= PASTE_MIN_LENGTH or not text.isascii():
+        return "paste"
+    return "keystroke"
+
+@traced("tools.paste_text")
+def paste_text(text, restore=True, restore_delay=None, verify_timeout=None):
+    """
+    Enter text by pasting it through the clipboard.
+    
+    The clipboard is checked before pasting, so a failed copy never pastes
+    stale contents. After the paste shortcut, the screen is watched until it
+    changes, which shows that the application handled the paste; a paste
+    that changes nothing on screen is reported but not retyped, since typing
+    it as well could enter the text twice.
+    
+    The previous clipboard contents are restored afterwards: as soon as the
+    paste shows on screen, after restore_delay if it never does, and right
+    away if nothing was pasted. They are not restored if the clipboard no
+    longer holds the pasted text, or if it held no text before (pyperclip
+    reads images and other contents as an empty string).
+    
+    Args:
+        text (str): The text to paste
+        restore (bool): Whether to restore the previous clipboard contents
+        restore_delay (float, optional): Seconds to wait before restoring a paste
+                                         that did not show on screen,
+                                         PASTE_RESTORE_DELAY by default
+        verify_timeout (float, optional): Seconds to wait for the paste to show
+                                          on screen, PASTE_VERIFY_TIMEOUT by default
+    
+    Returns:
+        bool: True if the text was pasted, False if the clipboard could not be set
+    """
+    backend = get_backend()
+    if not backend.has_clipboard:
+        return False
+    try:
+        previous = backend.get_clipboard()
+    except ClipboardError:
+        previous = None
+    
+    pasted = verified = False
+    try:
+        backend.set_clipboard(text)
+        # Some clipboards update asynchronously; give them a moment to catch up
+        for _ in range(5):
+            if backend.get_clipboard() == text:
+                break
+            time.sleep(0.01)
+        else:
+            print("Error pasting text: clipboard contents could not be set")
+            return False
+        
+        reference = backend.screenshot()
+        backend.hotkey(*backend.paste_keys)
+        pasted = True
+        verified = bool(wait_for_change(
+            reference, timeout=PASTE_VERIFY_TIMEOUT if verify_timeout is None else verify_timeout
+        ))
+        if not verified:
+            print("Warning: the screen did not change after pasting, the text may not have been entered")
+        return True
+    except ClipboardError as e:
+        print(f"Error pasting text: {e}")
+        return False
+    finally:
+        # Only text can be put back; an empty string stands for an image or an empty clipboard
+        if restore and isinstance(previous, str) and previous:
+            if pasted and not verified:
+                time.sleep(PASTE_RESTORE_DELAY if restore_delay is None else restore_delay)
+            try:
+                # Leave the clipboard alone if something else replaced the text meanwhile
+                if backend.get_clipboard() == text:
+                    backend.set_clipboard(previous)
+            except ClipboardError as e:
+                print(f"Error restoring clipboard: {e}")
+
+@traced("tools.type_text")
+def type_text(text, interval=0.05, strategy="auto"):
     """
-    Type the given text with a specified interval between keystrokes.
+    Type the given text, by keystrokes or by pasting it (see choose_typing_strategy).
     
     Args:
         text (str): The text to type
         interval (float): Seconds between keystrokes
+        strategy (str): 'auto', 'keystroke' or 'paste'
+    
+    Returns:
+        str: The strategy used, 'keystroke' or 'paste'
     """
-    pyautogui.write(text, interval=interval)
+    if choose_typing_strategy(text, strategy) == "paste" and paste_text(text):
+        return "paste"
+    get_backend().write(text, interval=interval)
+    return "keystroke"
 
+@traced("tools.press_key")
 def press_key(key):
     """
     Press and release a single key.
@@ -181,8 +325,9 @@ def press_key(key):
     Args:
         key (str): Key to press (e.g., 'a', 'enter', 'space', 'f1')
     """
-    pyautogui.press(key)
+    get_backend().press(key)
 
+@traced("tools.press_hotkey")
 def press_hotkey(*keys):
     """
     Press a combination of keys (hotkey).
@@ -191,8 +336,9 @@ def press_hotkey(*keys):
         *keys: Variable length list of keys to press simultaneously
                (e.g., 'command', 'c' for copy)
     """
-    pyautogui.hotkey(*keys)
+    get_backend().hotkey(*keys)
 
+@traced("tools.key_down")
 def key_down(key):
     """
     Press and hold a key.
@@ -200,8 +346,9 @@ def key_down(key):
     Args:
         key (str): Key to press down
     """
-    pyautogui.keyDown(key)
+    get_backend().key_down(key)
 
+@traced("tools.key_up")
 def key_up(key):
     """
     Release a previously pressed key.
@@ -209,12 +356,12 @@ def key_up(key):
     Args:
         key (str): Key to release
     """
-    pyautogui.keyUp(key)
+    get_backend().key_up(key)
 
 # Example usage (for reference, not to be executed)
 if __name__ == "__main__":
     # This is just an example and won't run when imported as a module
-    print("Screen size:", pyautogui.size())
+    print("Screen size:", get_backend().size())
     print("Current mouse position:", get_mouse_position())
     
     # Example: Move mouse to center of screen
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Tracing - Lightweight per-step span tracing with Chrome trace export
+
+This module records nested timing spans (capture, encode, network, grounding,
+actions, ...) and exports them as Chrome trace JSON, which can be opened in
+Perfetto (https://ui.perfetto.dev) or chrome://tracing.
+
+Tracing is disabled by default and costs a single attribute check per span
+while disabled. Set TRACE=1 in the environment or call tracer.enable().
+
+Always import this module as os_computer_use.tracing: importing it under
+another name as well would create a second tracer missing half of the spans.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+
+
+class _NullSpan:
+    """
+    Span returned while tracing is disabled; does nothing.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """
+    A timed section of code, recorded when the with-block exits.
+    """
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.record(self.name, self.start, end, self.args)
+        return False
+
+    def set(self, **args):
+        """
+        Attach extra arguments to the span, shown in the trace viewer.
+        """
+        self.args.update(args)
+
+
+class Tracer:
+    """
+    Collects spans from all threads of the process.
+    """
+
+    def __init__(self, enabled=False, max_events=1_000_000):
+        self.enabled = enabled
+        self.max_events = max_events  # Oldest events are dropped beyond this
+        self.events = []
+        self.origin = time.perf_counter_ns()  # Trace timestamps are relative to this
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        with self.lock:
+            self.events = []
+
+    def span(self, name, **args):
+        """
+        Time a block of code.
+
+        Args:
+            name (str): Span name, e.g. "screenshot.encode"
+            **args: Extra values shown with the span in the trace viewer
+
+        Returns:
+            Span: Context manager recording the span (a no-op while disabled)
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, args)
+
+    def traced(self, name=None):
+        """
+        Decorator timing every call of a function.
+
+        Args:
+            name (str, optional): Span name, defaults to module.function
+        """
+
+        def decorator(func):
+            span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Span(self, span_name, {}):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def record(self, name, start, end, args):
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": (start - self.origin) / 1000,
+            "dur": (end - start) / 1000,
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.events.append(event)
+            if len(self.events) > self.max_events:
+                del self.events[: len(self.events) - self.max_events]
+
+    def instant(self, name, **args):
+        """
+        Record a point in time, e.g. the start of an agent step.
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        event = {
+            "name": name,
+            "ph": "i",
+            "s": "p",
+            "ts": (now - self.origin) / 1000,
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.events.append(event)
+
+    def export_chrome_trace(self, filepath):
+        """
+        Write all recorded spans as Chrome trace JSON.
+
+        Args:
+            filepath (str): Destination path, e.g. "trace.json"
+
+        Returns:
+            int: Number of events written
+        """
+        with self.lock:
+            events = list(self.events)
+        thread_names = {
+            thread.ident: thread.name for thread in threading.enumerate()
+        }
+        metadata = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self.pid,
+                "tid": tid,
+                "args": {"name": thread_names[tid]},
+            }
+            for tid in {event["tid"] for event in events}
+            if tid in thread_names
+        ]
+        with open(filepath, "w") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f, default=str)
+        return len(events)
+
+
+# Create a global tracer, enabled with TRACE=1
+tracer = Tracer(enabled=os.getenv("TRACE", "") not in ("", "0"))
+span = tracer.span
+traced = tracer.traced
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import threading
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+
+
+# Connection limits for every pooled client, overridable through the environment
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "64"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "16"))
+KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+
+# Same order of magnitude as the SDK defaults: long reads for slow models, quick connects
+TIMEOUT = httpx.Timeout(600.0, connect=5.0)
+
+
+# HTTP/2 needs the optional h2 package, fall back to HTTP/1.1 keep-alive without it
+def http2_available():
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# Pool key for a base URL: connections can be shared by everything on the same origin
+def origin(base_url):
+    parts = urlsplit(base_url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class TransportRegistry:
+    """
+    A process-wide registry of pooled HTTP clients, shared by all providers talking to the same host
+    """
+
+    def __init__(
+        self,
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+        http2=None,
+    ):
+        self.configure(max_connections, max_keepalive_connections, keepalive_expiry, http2)
+        self.clients = {}
+        # Async clients are bound to the event loop they were created on
+        self.async_clients = weakref.WeakKeyDictionary()
+        self.lock = threading.Lock()
+
+    # Change the pool settings used for clients created from now on
+    def configure(
+        self,
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+        http2=None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2_available() if http2 is None else http2
+
+    def client_options(self):
+        return {
+            "limits": self.limits,
+            "http2": self.http2,
+            "timeout": TIMEOUT,
+            "follow_redirects": True,
+        }
+
+    # Get the shared sync client for a base URL
+    def get_client(self, base_url):
+        key = origin(base_url)
+        with self.lock:
+            client = self.clients.get(key)
+            if client is None or client.is_closed:
+                client = httpx.Client(**self.client_options())
+                self.clients[key] = client
+            return client
+
+    # Get the shared async client for a base URL on the running event loop
+    def get_async_client(self, base_url):
+        key = origin(base_url)
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            clients = self.async_clients.setdefault(loop, {})
+            client = clients.get(key)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(**self.client_options())
+                clients[key] = client
+            return client
+
+    # Close all sync clients, e.g. at the end of a run
+    def close(self):
+        with self.lock:
+            clients = list(self.clients.values())
+            self.clients.clear()
+        for client in clients:
+            client.close()
+
+
+# Create a global registry shared by all providers and scripts
+transport = TransportRegistry()
+
+
+def get_http_client(base_url):
+    return transport.get_client(base_url)
+
+
+def get_async_http_client(base_url):
+    return transport.get_async_client(base_url)